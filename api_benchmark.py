@@ -0,0 +1,144 @@
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from api_clients import ApiEndpoint
+from latency_stats import percentile
+
+
+class ApiStandIn:
+    """Local HTTP server standing in for a remote API.
+
+    connect_delay is paid once per new connection (DNS + TCP + TLS to a real
+    API), latency on every request. failure_rate of requests get a 503;
+    set down=True to fail every request after latency.
+    """
+
+    def __init__(self, connect_delay=0.15, latency=0.05, failure_rate=0.0, seed=1):
+        self.connect_delay = connect_delay
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.down = False
+        self.connections = 0
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin.connections += 1
+                time.sleep(standin.connect_delay)
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.requests += 1
+                    failed = standin.down or standin._random.random() < standin.failure_rate
+                time.sleep(standin.latency)
+                body = b'{"error": "unavailable"}' if failed else b'{"ok": true}'
+                self.send_response(503 if failed else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def timed(fn, count):
+    """Seconds per call and how many calls returned a 200."""
+    latencies, ok = [], 0
+    for _ in range(count):
+        started_at = time.perf_counter()
+        try:
+            ok += fn().status_code == 200
+        except requests.exceptions.RequestException:
+            pass
+        latencies.append(time.perf_counter() - started_at)
+    return latencies, ok
+
+
+def benchmark_pooling(count=30):
+    """A new connection per request (bare requests.get) against one kept-alive session."""
+    standin = ApiStandIn().start()
+    try:
+        print(f"📊 Stand-in: {standin.connect_delay * 1000:.0f} ms connection setup, "
+              f"{standin.latency * 1000:.0f} ms per request")
+        endpoint = ApiEndpoint("pooled", standin.url)
+        for label, fn in (("new connection", lambda: requests.get(standin.url + "/", timeout=5)),
+                          ("pooled session", lambda: endpoint.request("GET", "/"))):
+            connections_before = standin.connections
+            latencies_ms = [s * 1000 for s in timed(fn, count)[0]]
+            print(f"   {label:<15} mean {statistics.mean(latencies_ms):6.0f} ms  "
+                  f"p95 {percentile(latencies_ms, 0.95):6.0f} ms  "
+                  f"{standin.connections - connections_before} connections for {count} requests")
+        print(f"   histogram {endpoint.histogram()}")
+    finally:
+        standin.stop()
+
+
+def benchmark_retries(count=100, failure_rate=0.2):
+    """Requests that succeed when 1 in 5 gets a transient 503, with and without retries."""
+    standin = ApiStandIn(connect_delay=0.0, latency=0.01, failure_rate=failure_rate).start()
+    try:
+        print(f"📊 Stand-in failing {failure_rate:.0%} of requests with 503")
+        for label, retries in (("no retries", 0), ("2 retries", 2)):
+            endpoint = ApiEndpoint(f"retries-{retries}", standin.url, retries=retries, failure_threshold=count)
+            latencies, ok = timed(lambda: endpoint.request("GET", "/"), count)
+            print(f"   {label:<11} {ok}/{count} succeeded  mean {statistics.mean(latencies) * 1000:5.0f} ms  "
+                  f"{endpoint.retried} retries")
+    finally:
+        standin.stop()
+
+
+def benchmark_breaker(count=20, latency=0.3):
+    """A service that is down: how long each caller waits, with and without a circuit breaker."""
+    standin = ApiStandIn(connect_delay=0.0, latency=latency).start()
+    standin.down = True
+    try:
+        print(f"📊 Stand-in down, answering 503 after {latency * 1000:.0f} ms")
+        for label, threshold in (("no breaker", count + 1), ("breaker at 5", 5)):
+            endpoint = ApiEndpoint(f"breaker-{threshold}", standin.url, retries=0, failure_threshold=threshold)
+            requests_before = standin.requests
+            # CircuitOpenError is a requests ConnectionError, counted as a failed call
+            latencies_ms = [s * 1000 for s in timed(lambda: endpoint.request("GET", "/"), count)[0]]
+            print(f"   {label:<13} mean wait {statistics.mean(latencies_ms):5.0f} ms  "
+                  f"{standin.requests - requests_before} requests reached the service, "
+                  f"{endpoint.breaker.rejected} failed fast")
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    benchmark_pooling()
+    benchmark_retries()
+    benchmark_breaker()
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from latency_stats import percentile, recent_samples
+
+DEFAULT_TIMEOUT = (3, 10)    # (connect, read) seconds
+DEFAULT_RETRIES = 2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 0.2           # seconds; attempt n waits a random time up to BACKOFF_BASE * 2**n
+BACKOFF_CAP = 2.0
+FAILURE_THRESHOLD = 5        # consecutive failures that open an endpoint's circuit
+BREAKER_COOLDOWN = 30        # seconds before an open circuit lets a trial request through
+POOL_SIZE = 4                # keep-alive connections per endpoint, one per concurrent tool
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+# Every endpoint created, by name, for prewarm_all() and endpoint_stats()
+ENDPOINTS = {}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The endpoint failed repeatedly and is not being called until its cooldown ends."""
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after failure_threshold consecutive failures.
+
+    After cooldown seconds one trial request is let through (half-open); its
+    success closes the circuit again, its failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.opened = 0
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self._trial else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self.opened_at >= self.cooldown:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self._trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                    self.opened_at = time.monotonic()
+                    self.opened += 1
+            self._trial = False
+
+
+def backoff_seconds(attempt):
+    """Full jitter: spreads retries from concurrent callers instead of retrying in lockstep."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class ApiEndpoint:
+    """One remote service: a keep-alive requests.Session plus timeouts, retries and a circuit breaker.
+
+    request() sends an HTTP request through the pooled session; call() wraps a
+    request made some other way (e.g. an SDK client) with the same breaker and
+    latency accounting. Exceptions in retry_on and responses with a status in
+    retry_statuses are retried up to retries times with jittered backoff, so
+    only list read timeouts or 5xx for requests that are safe to repeat.
+    Responses in busy_statuses mean "try again later" by design (the braille
+    device's 503 when its queue is full) and don't count against the breaker.
+    While the circuit is open requests fail at once with CircuitOpenError, a
+    requests ConnectionError, so existing "can't reach" handling applies.
+    """
+
+    def __init__(self, name, base_url="", timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 retry_on=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+                 retry_statuses=RETRY_STATUSES, busy_statuses=(), headers=None, warm=None,
+                 failure_threshold=FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        """warm() opens connections ahead of the first request; by default a HEAD of base_url.
+        Pass warm=False for devices that shouldn't get unexpected requests."""
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_on = retry_on
+        self.retry_statuses = retry_statuses
+        self.busy_statuses = busy_statuses
+        self.warm = warm
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or {})
+
+        self.requests = 0
+        self.failures = 0
+        self.retried = 0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latencies = recent_samples()
+        self._lock = threading.Lock()
+        ENDPOINTS[name] = self
+
+    def request(self, method, path, **kwargs):
+        """Send method path (relative to base_url, or an absolute URL) and return the response."""
+        url = path if path.startswith(("http://", "https://")) else self.base_url + path
+        kwargs.setdefault("timeout", self.timeout)
+        return self.call(self.session.request, method, url, **kwargs)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs), one request to this endpoint, with the breaker, retries and timing."""
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} is failing, not calling it for up to {self.breaker.cooldown}s")
+            started_at = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except self.retry_on:
+                self._record(started_at, ok=False)
+                if attempt == self.retries:
+                    raise
+            except Exception:
+                self._record(started_at, ok=False)
+                raise
+            else:
+                status = getattr(result, "status_code", None)
+                if status in self.retry_statuses and attempt < self.retries:
+                    self._record(started_at, ok=False)
+                else:
+                    self._record(started_at, ok=status is None or status < 500 or status in self.busy_statuses)
+                    return result
+            self.retried += 1
+            time.sleep(backoff_seconds(attempt))
+
+    def prewarm(self):
+        """Open a pooled connection (DNS, TCP and TLS) now; True if the service answered."""
+        if self.warm is False or (self.warm is None and not self.base_url):
+            return False
+        try:
+            if self.warm:
+                self.warm()
+            else:
+                self.session.head(self.base_url, timeout=self.timeout)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not pre-warm {self.name}: {e}")
+            return False
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self.latencies)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retried": self.retried,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+            "rejected": self.breaker.rejected,
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "histogram_ms": self.histogram(),
+        }
+
+    def histogram(self):
+        """Request count per latency bucket, e.g. {"<=100": 3, ">5000": 1}."""
+        labels = [f"<={edge}" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {label: count for label, count in zip(labels, self.latency_buckets) if count}
+
+    def _record(self, started_at, ok):
+        seconds = time.perf_counter() - started_at
+        bucket = next((i for i, edge in enumerate(LATENCY_BUCKETS_MS) if seconds * 1000 <= edge),
+                      len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.requests += 1
+            self.failures += not ok
+            self.latency_buckets[bucket] += 1
+            self.latencies.append(seconds)
+        self.breaker.record(ok)
+
+
+def prewarm_all():
+    """Pre-warm every endpoint in parallel; returns the names that answered."""
+    results = {}
+    threads = [threading.Thread(target=lambda e=endpoint: results.__setitem__(e.name, e.prewarm()), daemon=True)
+               for endpoint in list(ENDPOINTS.values())]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [name for name, ok in results.items() if ok]
+
+
+def endpoint_stats():
+    return {name: endpoint.stats() for name, endpoint in ENDPOINTS.items()}
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import random
+import sys
+import time
+
+import speech_recognition as sr
+
+from latency_stats import percentile
+from speech_backends import (FailoverRecognizer, ReplayBackend, configured_backends,
+                             load_wav_utterances)
+
+SAMPLE_TRANSCRIPTS = [
+    "what is in front of me",
+    "read the sign for me",
+    "who is this",
+    "turn braille mode on",
+    "describe the room",
+    "next sentence",
+]
+
+
+def synthetic_utterances(count=60, seed=1):
+    """Distinct fake utterances (noise PCM + transcript) for runs without recorded WAVs."""
+    rng = random.Random(seed)
+    return [(f"synthetic-{i}", sr.AudioData(rng.randbytes(3200), 16000, 2), SAMPLE_TRANSCRIPTS[i % len(SAMPLE_TRANSCRIPTS)])
+            for i in range(count)]
+
+
+class FlakyBackend(ReplayBackend):
+    """Replay backend that behaves like a network engine: usual latency, occasional errors and spikes."""
+
+    name = "network"
+
+    def __init__(self, utterances, latency=0.3, error_rate=0.1, spike_rate=0.1, spike_latency=5.0, seed=2):
+        super().__init__(utterances, latency)
+        self.error_rate = error_rate
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.rng = random.Random(seed)
+
+    def recognize(self, audio):
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            time.sleep(self.latency)
+            raise sr.RequestError("connection reset")
+        if roll < self.error_rate + self.spike_rate:
+            time.sleep(self.spike_latency)
+        return super().recognize(audio)
+
+
+def run(recognize, utterances):
+    """Recognize every utterance; returns (seconds per utterance, failed count)."""
+    latencies, failed = [], 0
+    for _, audio, _ in utterances:
+        started_at = time.perf_counter()
+        try:
+            recognize(audio)
+        except (sr.RequestError, sr.UnknownValueError):
+            failed += 1
+        latencies.append(time.perf_counter() - started_at)
+    return latencies, failed
+
+
+def benchmark_failover(utterances=None):
+    """Flaky network engine alone vs. failing over to a local one."""
+    utterances = utterances or synthetic_utterances()
+    for label, backends in (
+        ("network only", [FlakyBackend(utterances)]),
+        ("with failover", [FlakyBackend(utterances), ReplayBackend(utterances, latency=0.15)]),
+    ):
+        recognizer = FailoverRecognizer(backends, latency_budget=1.0, cooldown=2.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, failed = run(recognizer.recognize, utterances)
+        latencies_ms = sorted(l * 1000 for l in latencies)
+        print(f"📊 {label:<13} mean {sum(latencies_ms) / len(latencies_ms):6.0f} ms  "
+              f"p95 {percentile(latencies_ms, 0.95):6.0f} ms  "
+              f"max {latencies_ms[-1]:6.0f} ms  {failed:2d}/{len(utterances)} failed  "
+              f"{recognizer.failovers} failovers")
+
+
+def benchmark_accuracy(directory):
+    """Latency and word error rate of every configured backend on recorded WAVs with transcripts."""
+    utterances = load_wav_utterances(directory)
+    if not utterances:
+        print(f"❌ No name.wav + name.txt pairs in {directory}")
+        return
+    for backend in configured_backends():
+        for _, audio, reference in utterances:
+            try:
+                backend.score(reference, backend.timed_recognize(audio))
+            except sr.UnknownValueError:
+                backend.score(reference, "")
+            except sr.RequestError as e:
+                print(f"⚠️ {backend.name}: {e}")
+        stats = backend.stats()
+        wer = f"{stats['wer']:.1%}" if stats["wer"] is not None else "n/a"
+        print(f"📊 {backend.name:<7} WER {wer:>6}  p50 {stats['p50_ms']:6.0f} ms  "
+              f"p95 {stats['p95_ms']:6.0f} ms  {stats['failures']} failures over {len(utterances)} utterances")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        benchmark_accuracy(sys.argv[1])
+    benchmark_failover()
@@ -0,0 +1,121 @@
+import asyncio
+import concurrent.futures
+import time
+
+from latency_stats import mean, percentile, recent_samples
+
+STAGE_QUEUE_SIZE = 4
+
+
+class Stage:
+    """One step of the assistant pipeline.
+
+    handler(item) is a plain blocking function, run on an executor thread so
+    the event loop never waits on a library call. Whatever it returns (other
+    than None) is passed to the next stage; a stage without an input queue is
+    a source and its handler is called with no argument, over and over.
+    """
+
+    def __init__(self, name, handler, queue_size=STAGE_QUEUE_SIZE, source=False):
+        self.name = name
+        self.handler = handler
+        self.source = source
+        self.queue = None if source else asyncio.Queue(maxsize=queue_size)
+        self.next = None
+        self.processed = 0
+        self.errors = 0
+        self.restarts = 0
+        self.max_queue_depth = 0
+        self.latencies = recent_samples()
+
+    def stats(self):
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_ms": mean(self.latencies) * 1000,
+            "p95_ms": percentile(self.latencies, 0.95) * 1000,
+        }
+
+
+class AssistantEngine:
+    """Runs a chain of stages connected by bounded asyncio queues.
+
+    A full queue blocks the stage feeding it, so a slow stage (e.g. speech
+    output) slows the ones before it instead of piling up work. An exception in
+    a handler is counted and only drops that item; a stage task that dies is
+    restarted, so the engine keeps running. emit() lets blocking code running
+    in an executor (e.g. a streaming model call) feed a stage directly, and
+    drain() empties a stage's queue (e.g. when the user stops the reply).
+    """
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+        self.loop = None
+        # One thread per stage: each stage handles a single item at a time
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="stage")
+
+    def emit(self, stage_name, item):
+        """Queue item for a stage from a non-async thread; blocks while that stage is full."""
+        stage = self.stages[stage_name]
+        asyncio.run_coroutine_threadsafe(self._put(stage, item), self.loop).result()
+
+    def drain(self, stage_name):
+        """Drop every item waiting for a stage, from a non-async thread; returns how many."""
+        stage = self.stages[stage_name]
+        return asyncio.run_coroutine_threadsafe(self._drain(stage), self.loop).result()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        await asyncio.gather(*(self._supervise(stage) for stage in self.stages.values()))
+
+    def stats(self):
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+    async def _supervise(self, stage):
+        while True:
+            try:
+                await self._run_stage(stage)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.restarts += 1
+                print(f"❌ Stage {stage.name} crashed ({e}), restarting")
+                await asyncio.sleep(0.1)
+
+    async def _run_stage(self, stage):
+        while True:
+            item = None if stage.source else await stage.queue.get()
+            started_at = time.perf_counter()
+            try:
+                if stage.source:
+                    result = await self.loop.run_in_executor(self._executor, stage.handler)
+                else:
+                    result = await self.loop.run_in_executor(self._executor, stage.handler, item)
+            except Exception as e:
+                stage.errors += 1
+                print(f"❌ {stage.name} stage error: {e}")
+                continue
+            if stage.source and result is None:
+                continue  # nothing arrived this time
+            stage.processed += 1
+            stage.latencies.append(time.perf_counter() - started_at)
+            if result is not None and stage.next:
+                await self._put(stage.next, result)
+
+    @staticmethod
+    async def _drain(stage):
+        dropped = 0
+        while not stage.queue.empty():
+            stage.queue.get_nowait()
+            dropped += 1
+        return dropped
+
+    @staticmethod
+    async def _put(stage, item):
+        await stage.queue.put(item)
+        stage.max_queue_depth = max(stage.max_queue_depth, stage.queue.qsize())
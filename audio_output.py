@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+import pyaudio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # pcm_s16le mono
+FRAMES_PER_BUFFER = 1024
+
+
+def configured_output_device():
+    """Output device index from AUDIO_OUTPUT_DEVICE_INDEX, or None for the system default."""
+    value = os.getenv("AUDIO_OUTPUT_DEVICE_INDEX")
+    return int(value) if value not in (None, "") else None
+
+
+class AudioSink:
+    """One output stream for the whole run, fed from a jitter buffer by a playback thread.
+
+    Producers (the TTS WebSocket thread) call write() and return immediately.
+    Playback starts once prebuffer_ms of audio is queued (or the producer calls
+    mark_end()), so network jitter doesn't turn into audible gaps. Running dry
+    before mark_end() counts as an underrun; writing more than capacity_seconds
+    ahead drops the oldest audio and counts as an overflow.
+    """
+
+    def __init__(self, device_index=None, sample_rate=SAMPLE_RATE, capacity_seconds=30,
+                 prebuffer_ms=80, chunk_ms=20):
+        self.device_index = configured_output_device() if device_index is None else device_index
+        self.sample_rate = sample_rate
+        self.bytes_per_ms = sample_rate * SAMPLE_WIDTH // 1000
+        self.capacity = capacity_seconds * 1000 * self.bytes_per_ms
+        self.prebuffer = prebuffer_ms * self.bytes_per_ms
+        self.chunk = chunk_ms * self.bytes_per_ms
+        self.audio = None
+        self.stream = None
+        self.underruns = 0
+        self.overflows = 0
+        self.bytes_played = 0
+        self.max_depth = 0
+        self._buffer = bytearray()
+        self._ended = True       # the producer has nothing more for the current stream
+        self._playing = False    # past the prebuffer, draining to the device
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Open the output device and start the playback thread; False if the device can't be opened."""
+        try:
+            self.audio = pyaudio.PyAudio()
+            self.stream = self.audio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                output=True,
+                frames_per_buffer=FRAMES_PER_BUFFER,
+                output_device_index=self.device_index
+            )
+        except Exception as e:
+            print(f"❌ Error setting up audio: {e}")
+            self.close()
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+        print(f"🔈 Audio output ready (device {self.device_index if self.device_index is not None else 'default'})")
+        return True
+
+    @property
+    def depth_ms(self):
+        return len(self._buffer) / self.bytes_per_ms
+
+    def write(self, data: bytes):
+        """Queue PCM audio for playback without blocking."""
+        with self._condition:
+            self._ended = False
+            self._buffer += data
+            overflow = len(self._buffer) - self.capacity
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.overflows += 1
+            self.max_depth = max(self.max_depth, len(self._buffer))
+            self._condition.notify()
+
+    def mark_end(self):
+        """The current utterance is complete: play out the tail even if below the prebuffer."""
+        with self._condition:
+            self._ended = True
+            self._condition.notify()
+
+    def flush(self):
+        """Drop everything not yet played (e.g. when the user interrupts)."""
+        with self._condition:
+            self._buffer.clear()
+            self._ended = True
+            self._playing = False
+            self._condition.notify_all()
+
+    def drain(self, timeout=None):
+        """Block until everything written so far has been played; False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._running and (self._buffer or self._playing):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(timeout=remaining)
+        return True
+
+    def stats(self):
+        return {
+            "depth_ms": self.depth_ms,
+            "max_depth_ms": self.max_depth / self.bytes_per_ms,
+            "underruns": self.underruns,
+            "overflows": self.overflows,
+            "seconds_played": self.bytes_played / (self.bytes_per_ms * 1000),
+        }
+
+    def close(self):
+        """Stop playback and release the device."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
+
+    def _next_chunk(self):
+        """Wait for the next block to play, handling prebuffering and underruns."""
+        with self._condition:
+            while self._running:
+                if not self._playing and self._buffer and (len(self._buffer) >= self.prebuffer or self._ended):
+                    self._playing = True
+                if self._playing:
+                    if self._buffer:
+                        chunk = bytes(self._buffer[:self.chunk])
+                        del self._buffer[:self.chunk]
+                        return chunk
+                    if not self._ended:
+                        self.underruns += 1
+                    self._playing = False
+                    self._condition.notify_all()
+                self._condition.wait()
+        return None
+
+    def _play(self):
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return
+            try:
+                self.stream.write(chunk)
+                self.bytes_played += len(chunk)
+            except Exception as e:
+                print(f"❌ Error playing audio: {e}")
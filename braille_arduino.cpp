@@ -14,6 +14,20 @@ int servoPins[6] = {2, 3, 4, 5, 6, 7};
 const int highPosition = 105;  // Servo position for '1' (raised dot)
 const int lowPosition = 90;    // Servo position for '0' (lowered dot)
 
+// Dot raised by each servo; a cell byte has bit (dot - 1) set for every raised dot
+const int servoDots[6] = {1, 4, 2, 5, 3, 6};
+
+// Batch queue: cells received in one POST /cells request are played back locally
+const int QUEUE_CAPACITY = 64;   // Keep in sync with DEVICE_QUEUE_CAPACITY in braille_control.py
+const int CELL_RECORD_SIZE = 3;  // POST /cells body: cell byte + little-endian uint16 dwell (ms)
+uint8_t queuedCells[QUEUE_CAPACITY];
+unsigned long queuedDwells[QUEUE_CAPACITY];
+int queueHead = 0;
+int queueCount = 0;
+unsigned long nextCellAt = 0;
+bool batchActive = false;
+uint8_t currentCell = 0;         // Dots currently raised, so unchanged servos are left alone
+
 void setup() {
   Serial.begin(115200);
   while (!Serial) delay(10);
@@ -48,6 +62,39 @@ void setup() {
   Serial.println("Ready to receive Braille patterns!");
 }
 
+bool isValidPattern(String pattern) {
+  if (pattern.length() != 6) {
+    return false;
+  }
+  for (int i = 0; i < 6; i++) {
+    if (pattern[i] != '0' && pattern[i] != '1') {
+      return false;
+    }
+  }
+  return true;
+}
+
+int servoPosition(int i, char bit) {
+  if (bit == '1') {
+    int position = highPosition;  // Raised dot
+    if (i >= 3) {
+      position = 180 - position;
+    }
+    return position;
+  }
+  return lowPosition;  // Lowered dot
+}
+
+uint8_t patternToCell(String pattern) {
+  uint8_t cell = 0;
+  for (int i = 0; i < 6; i++) {
+    if (pattern[i] == '1') {
+      cell |= 1 << (servoDots[i] - 1);
+    }
+  }
+  return cell;
+}
+
 void setBraillePattern(String pattern) {
   Serial.println("==========================================");
   Serial.println("📍 RECEIVED BRAILLE PATTERN:");
@@ -60,44 +107,29 @@ void setBraillePattern(String pattern) {
   }
   
   // Validate pattern (only 0s and 1s allowed)
-  for (int i = 0; i < 6; i++) {
-    if (pattern[i] != '0' && pattern[i] != '1') {
-      Serial.println("❌ ERROR: Pattern must contain only 0s and 1s");
-      return;
-    }
+  if (!isValidPattern(pattern)) {
+    Serial.println("❌ ERROR: Pattern must contain only 0s and 1s");
+    return;
   }
   
   Serial.println("📊 SERVO CONTROL:");
   
   // Set each servo based on bit value
   for (int i = 0; i < 6; i++) {
-    int position;
-    if (pattern[i] == '1') {
-      position = highPosition;  // Raised dot
-      if (i >= 3) {
-        position = 180 - position;
-      }
-      Serial.print("   Servo ");
-      Serial.print(i);
-      Serial.print(" (Pin ");
-      Serial.print(servoPins[i]);
-      Serial.print("): HIGH (");
-      Serial.print(position);
-      Serial.println("°)");
-    } else {
-      position = lowPosition;   //  Lowered dot
-      Serial.print("   Servo ");
-      Serial.print(i);
-      Serial.print(" (Pin ");
-      Serial.print(servoPins[i]);
-      Serial.print("): LOW (");
-      Serial.print(position);
-      Serial.println("°)");
-    }
+    int position = servoPosition(i, pattern[i]);
+    Serial.print("   Servo ");
+    Serial.print(i);
+    Serial.print(" (Pin ");
+    Serial.print(servoPins[i]);
+    Serial.print("): ");
+    Serial.print(pattern[i] == '1' ? "HIGH (" : "LOW (");
+    Serial.print(position);
+    Serial.println("°)");
     
     servos[i].write(position);
     // delay(50);  // Small delay between servo movements
   }
+  currentCell = patternToCell(pattern);
   delay(1000);
   
   Serial.println("✅ Pattern applied successfully!");
@@ -105,12 +137,129 @@ void setBraillePattern(String pattern) {
 
 }
 
+void resetServos() {
+  Serial.println("🔄 Resetting all servos to default LOW position (90°)...");
+  for (int i = 0; i < 6; i++) {
+    servos[i].write(90);  // Reset to 90 degrees (lowPosition)
+    Serial.print("   Servo ");
+    Serial.print(i);
+    Serial.print(" (Pin ");
+    Serial.print(servoPins[i]);
+    Serial.println("): 90°");
+    // delay(50);
+  }
+  currentCell = 0;
+  Serial.println("✅ All servos reset to default position (90°)\n");
+}
+
+// Append cells to the queue. All-or-nothing: returns count, or 0 if they do not fit.
+int enqueueCells(const uint8_t* cells, const unsigned long* dwells, int count) {
+  if (queueCount + count > QUEUE_CAPACITY) {
+    return 0;
+  }
+  for (int i = 0; i < count; i++) {
+    int slot = (queueHead + queueCount) % QUEUE_CAPACITY;
+    queuedCells[slot] = cells[i];
+    queuedDwells[slot] = dwells[i];
+    queueCount++;
+  }
+  return count;
+}
+
+// Read a binary POST /cells body of 3-byte records and queue every cell.
+// Returns the number of cells queued, -1 if the body is malformed, or 0 if the
+// cells do not fit in the remaining queue space.
+int enqueueCellRecords(WiFiClient& client, int contentLength) {
+  if (contentLength <= 0 || contentLength % CELL_RECORD_SIZE != 0) {
+    return -1;
+  }
+  int count = contentLength / CELL_RECORD_SIZE;
+  if (count > QUEUE_CAPACITY) {
+    return 0;
+  }
+  
+  uint8_t body[QUEUE_CAPACITY * CELL_RECORD_SIZE];
+  if ((int)client.readBytes(body, contentLength) != contentLength) {
+    return -1;
+  }
+  
+  uint8_t cells[QUEUE_CAPACITY];
+  unsigned long dwells[QUEUE_CAPACITY];
+  for (int i = 0; i < count; i++) {
+    const uint8_t* record = body + i * CELL_RECORD_SIZE;
+    if (record[0] > 0x3F) {
+      return -1;  // Only six dots
+    }
+    cells[i] = record[0];
+    dwells[i] = record[1] | (record[2] << 8);
+  }
+  return enqueueCells(cells, dwells, count);
+}
+
+void sendBatchResponse(WiFiClient& client, int queued) {
+  if (queued > 0) {
+    client.println("HTTP/1.1 200 OK");
+  } else if (queued == 0) {
+    client.println("HTTP/1.1 503 Service Unavailable");
+  } else {
+    client.println("HTTP/1.1 400 Bad Request");
+  }
+  client.println("Content-Type: text/plain");
+  client.println("Connection: close");
+  client.println();
+  if (queued > 0) {
+    client.println("OK: Queued " + String(queued) + " cells (" + String(queueCount) + " pending)");
+  } else if (queued == 0) {
+    client.println("BUSY: Queue full (" + String(queueCount) + " pending)");
+  } else {
+    client.println("ERROR: Malformed batch");
+  }
+}
+
+// Play queued cells one after another without blocking the HTTP server
+void serviceQueue() {
+  unsigned long now = millis();
+  if ((long)(now - nextCellAt) < 0) {
+    return;
+  }
+  
+  if (queueCount > 0) {
+    uint8_t cell = queuedCells[queueHead];
+    uint8_t changed = cell ^ currentCell;
+    // Only move the servos whose dot actually changes; the host's dwell time assumes this
+    for (int i = 0; i < 6; i++) {
+      uint8_t bit = 1 << (servoDots[i] - 1);
+      if (changed & bit) {
+        servos[i].write(servoPosition(i, (cell & bit) ? '1' : '0'));
+      }
+    }
+    currentCell = cell;
+    Serial.print("▶️  Cell 0x");
+    Serial.print(cell, HEX);
+    Serial.print(" for ");
+    Serial.print(queuedDwells[queueHead]);
+    Serial.println(" ms");
+    
+    nextCellAt = now + queuedDwells[queueHead];
+    queueHead = (queueHead + 1) % QUEUE_CAPACITY;
+    queueCount--;
+    batchActive = true;
+  } else if (batchActive) {
+    batchActive = false;
+    resetServos();
+  }
+}
+
 void loop() {
+  serviceQueue();
+  
   WiFiClient client = server.available();
   
   if (client) {
     Serial.println("🔗 New client connected");
     String request = "";
+    bool postCells = false;
+    int contentLength = 0;
     
     // Read the HTTP request
     while (client.connected() && client.available()) {
@@ -118,7 +267,25 @@ void loop() {
       line.trim();
       
       if (line.length() == 0) {
-        break;  // End of HTTP headers
+        // End of HTTP headers; a POST /cells body follows them
+        if (postCells) {
+          int queued = enqueueCellRecords(client, contentLength);
+          Serial.print("📨 CELLS REQUEST RECEIVED: ");
+          Serial.print(contentLength / CELL_RECORD_SIZE);
+          Serial.println(" cells");
+          sendBatchResponse(client, queued);
+        }
+        break;
+      }
+      
+      if (line.startsWith("POST /cells")) {
+        postCells = true;
+        continue;
+      }
+      
+      if (line.startsWith("Content-Length:")) {
+        contentLength = line.substring(15).toInt();
+        continue;
       }
       
       if (line.startsWith("GET /braille/")) {
@@ -143,23 +310,31 @@ void loop() {
         client.println("OK: Pattern " + pattern + " applied");
         break;
       }
+      
+      if (line.startsWith("GET /clear")) {
+        // Drop queued cells so a cancelled batch stops immediately
+        queueHead = 0;
+        queueCount = 0;
+        batchActive = false;
+        nextCellAt = millis();
+        Serial.println("⏹️ Queue cleared");
+        
+        client.println("HTTP/1.1 200 OK");
+        client.println("Content-Type: text/plain");
+        client.println("Connection: close");
+        client.println();
+        client.println("OK: Queue cleared");
+        break;
+      }
     }
     
     // Close connection
     client.stop();
     Serial.println("🔌 Client disconnected");
     
-    // Reset all servos to low position (90 degrees)
-    Serial.println("🔄 Resetting all servos to default LOW position (90°)...");
-    for (int i = 0; i < 6; i++) {
-      servos[i].write(90);  // Reset to 90 degrees (lowPosition)
-      Serial.print("   Servo ");
-      Serial.print(i);
-      Serial.print(" (Pin ");
-      Serial.print(servoPins[i]);
-      Serial.println("): 90°");
-      // delay(50);
+    // Leave the servos alone while a batch is still being played back
+    if (queueCount == 0 && !batchActive) {
+      resetServos();
     }
-    Serial.println("✅ All servos reset to default position (90°)\n");
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,181 @@
+import contextlib
+import io
+import sys
+import time
+
+import braille_control
+import braille_scheduler
+import braille_translator
+from braille_simulator import BrailleDeviceSimulator
+from latency_stats import percentile
+
+SAMPLE_SENTENCES = [
+    "The person in front of you is smiling and wearing a blue jacket.",
+    "There is a table with two chairs and a laptop on the right side of the room.",
+    "The sign says that the store will be closed for renovations until next Monday.",
+    "Which way is the nearest exit? Follow the green signs through the hallway.",
+    "Your friend Sarah is standing near the window, and she seems to be waving at you.",
+    "The menu shows coffee for three dollars and tea for two dollars fifty.",
+    "Please keep your ticket with you at all times during the journey.",
+    "It looks like the light is red, so wait before you cross the street.",
+]
+
+
+def legacy_english_to_braille(text):
+    """Frozen copy of the original per-character translator, kept as a baseline."""
+    braille_dict = {
+        'a': '100000', 'b': '101000', 'c': '110000', 'd': '110100',
+        'e': '100100', 'f': '111000', 'g': '111100', 'h': '101100',
+        'i': '011000', 'j': '011100', 'k': '100010', 'l': '101010',
+        'm': '110010', 'n': '110110', 'o': '100110', 'p': '111010',
+        'q': '111110', 'r': '101110', 's': '011010', 't': '011110',
+        'u': '100011', 'v': '101011', 'w': '011101', 'x': '110011',
+        'y': '110111', 'z': '100111',
+        '1': '100000', '2': '101000', '3': '110000', '4': '110100',
+        '5': '100100', '6': '111000', '7': '111100', '8': '101100',
+        '9': '011000', '0': '011100',
+        '.': '010011', ',': '010000', '?': '011001', '!': '011010',
+        '-': '001001', "'": '000010', ':': '010010', ';': '011000',
+        ' ': '000000'
+    }
+    braille_output = []
+    for char in text:
+        if char.isupper():
+            braille_output.append('000001')
+            char = char.lower()
+        if char.isdigit():
+            braille_output.append('001111')
+        braille_output.append(braille_dict.get(char, '000000'))
+    return braille_output
+
+
+@contextlib.contextmanager
+def scaled_schedule(time_scale):
+    """Temporarily scale the scheduler's timing model to match a time-scaled simulator."""
+    names = ("MIN_READ_MS", "SERVO_MOVE_MS", "PER_SERVO_MS")
+    saved = {name: getattr(braille_scheduler, name) for name in names}
+    for name, value in saved.items():
+        setattr(braille_scheduler, name, value * time_scale)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(braille_scheduler, name, value)
+
+
+def run_display(device, text, delay, batched):
+    """Translate and display text against the simulator; returns measured wall seconds."""
+    braille_control.ARDUINO_IP = device.host
+    braille_control.PORT = device.port
+    device.reset_stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), scaled_schedule(device.time_scale):
+        cells = braille_control.english_to_braille(text)
+        scaled_delay = None if delay is None else delay * device.time_scale
+        braille_control.display_braille_on_arduino(cells, scaled_delay, batched=batched)
+    device.wait_until_idle(timeout=120)
+    return time.perf_counter() - start, len(cells)
+
+
+def benchmark_throughput(text=" ".join(SAMPLE_SENTENCES[:4]), time_scale=0.02, latency=0.03):
+    """End-to-end english_to_braille -> display_braille_on_arduino throughput on the simulator.
+
+    The simulator runs time_scale times faster than the real firmware; reported
+    times are projected back to real time (loopback overhead gets scaled up too,
+    so the per-request paths are slightly pessimistic).
+    """
+    modes = (
+        ("per-cell 1.0s", 1.0, False),
+        ("batched 1.0s", 1.0, True),
+        ("batched adaptive", None, True),
+    )
+    device = BrailleDeviceSimulator(latency=latency, time_scale=time_scale).start()
+    try:
+        print(f"📊 {len(text)} characters, {latency * 1000:.0f} ms link latency, simulated at {1 / time_scale:.0f}x")
+        print(f"   {'mode':<17} {'cells/s':>7} {'s/1k chars':>10} {'requests':>8} "
+              f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'unsettled':>9}")
+        for label, delay, batched in modes:
+            elapsed, cell_count = run_display(device, text, delay, batched)
+            projected = elapsed / time_scale
+            latencies_ms = [seconds / time_scale * 1000 for _, seconds in device.requests]
+            print(f"   {label:<17} {cell_count / projected:7.2f} {projected * 1000 / len(text):10.1f} "
+                  f"{len(latencies_ms):8d} {percentile(latencies_ms, 0.5):7.0f} "
+                  f"{percentile(latencies_ms, 0.95):7.0f} {percentile(latencies_ms, 0.99):7.0f} "
+                  f"{device.undersettled:9d}")
+    finally:
+        device.stop()
+
+
+def translate_uncached(text):
+    """Grade 2 with every word translated from scratch, as for words not seen before."""
+    braille_translator.clear_word_cache()
+    return braille_control.english_to_braille(text)
+
+
+def benchmark_translation(sentences=SAMPLE_SENTENCES, rounds=200):
+    """Compare cells per sentence and translation speed of the legacy, Grade 1 and Grade 2 paths."""
+    translators = (
+        ("legacy", legacy_english_to_braille),
+        ("grade 1", lambda text: braille_control.english_to_braille(text, contracted=False)),
+        ("grade 2", braille_control.english_to_braille),
+        ("grade 2 cold", translate_uncached),
+    )
+    characters = sum(len(s) for s in sentences)
+    baseline = None
+    print(f"📊 {len(sentences)} sentences, {characters} characters")
+    for label, translate in translators:
+        cells = sum(len(translate(s)) for s in sentences)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for sentence in sentences:
+                translate(sentence)
+        per_sentence_us = (time.perf_counter() - start) / (rounds * len(sentences)) * 1e6
+        baseline = baseline or cells
+        print(f"   {label:<12} {cells / len(sentences):6.1f} cells/sentence  "
+              f"{100 * (1 - cells / baseline):5.1f}% fewer cells  {per_sentence_us:7.1f} µs/sentence")
+
+
+def benchmark_long_text(repeat=50):
+    """Translate a long OCR-sized text in one go and compare time and memory footprint."""
+    text = " ".join(SAMPLE_SENTENCES * repeat)
+    print(f"📊 Long text: {len(text)} characters")
+    braille_translator.clear_word_cache()
+    for label, translate in (
+        ("legacy", legacy_english_to_braille),
+        ("grade 1", lambda t: braille_control.english_to_braille(t, contracted=False)),
+        # Cold translates each distinct word once, warm finds them all cached
+        ("grade 2 cold", braille_control.english_to_braille),
+        ("grade 2 warm", braille_control.english_to_braille),
+    ):
+        start = time.perf_counter()
+        cells = translate(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if isinstance(cells, list):
+            # Pattern strings are shared, so count each distinct one once
+            size = sys.getsizeof(cells) + sum(sys.getsizeof(c) for c in set(cells))
+        else:
+            size = sys.getsizeof(cells)
+        print(f"   {label:<12} {len(cells):6d} cells  {elapsed_ms:7.2f} ms  {size / 1024:8.1f} KiB")
+
+
+def benchmark_scheduling(sentences=SAMPLE_SENTENCES, fixed_delay=1.0):
+    """Simulate display time with a fixed dwell vs the servo-aware schedule."""
+    characters = sum(len(s) for s in sentences)
+    cells = b"".join(braille_control.english_to_braille(s + " ") for s in sentences)
+    scheduled, dwells_ms, is_blink = braille_scheduler.schedule_cells(cells)
+    moves = [braille_scheduler.moved_servos(a, b) for a, b in zip(b"\0" + scheduled, scheduled)]
+    print(f"📊 {len(cells)} cells, {is_blink.count(True)} repeat blinks, "
+          f"{sum(moves) / len(moves):.1f} servos moved per cell")
+    for label, seconds in (
+        (f"fixed {fixed_delay:.1f}s", len(cells) * fixed_delay),
+        ("adaptive", sum(dwells_ms) / 1000),
+    ):
+        print(f"   {label:<9} {seconds:6.1f} s  {characters / seconds * 60:6.1f} chars/min  "
+              f"{len(cells) / seconds * 60:6.1f} cells/min")
+
+
+if __name__ == "__main__":
+    benchmark_scheduling()
+    benchmark_translation()
+    benchmark_long_text()
+    benchmark_throughput()
@@ -1,16 +1,31 @@
 import requests
 import time
 
+import braille_scheduler
+import braille_translator
+from api_clients import ApiEndpoint
+
 ARDUINO_IP = "10.37.97.204"  # Update this with your Arduino's IP
 PORT = 8080
 
+BATCH_SIZE = 24              # Max cells per POST /cells request
+DEVICE_QUEUE_CAPACITY = 64   # Must match QUEUE_CAPACITY in braille_arduino.cpp
+BUSY_RETRIES = 20            # Times to retry a batch the device rejected with 503 (queue full)
+BLANK_CELL = braille_translator.BLANK
+
+# Kept-alive connection to the device. Only connection failures are retried: a request that
+# reached the device may already have queued its cells, and 503 (queue full) is handled below.
+arduino = ApiEndpoint("arduino", timeout=(2, 10), retries=1,
+                      retry_on=(requests.exceptions.ConnectionError,), retry_statuses=(), busy_statuses=(503,),
+                      warm=False)
+
 def send_braille_pattern(pattern: str):
     """Send 6-bit pattern to Arduino via HTTP GET request."""
     try:
         url = f"http://{ARDUINO_IP}:{PORT}/braille/{pattern}"
         print(f"📤 Sending HTTP request to: {url}")
         
-        response = requests.get(url, timeout=10)
+        response = arduino.request("GET", url)
         
         if response.status_code == 200:
             print(f"✅ Success! Arduino response: {response.text.strip()}")
@@ -20,7 +35,7 @@ def send_braille_pattern(pattern: str):
             return False
             
     except requests.exceptions.Timeout:
-        print(f"❌ Timeout: Arduino didn't respond within 5 seconds")
+        print(f"❌ Timeout: Arduino didn't respond within {arduino.timeout[1]} seconds")
         return False
     except requests.exceptions.ConnectionError:
         print(f"❌ Connection Error: Can't reach Arduino at {ARDUINO_IP}:{PORT}")
@@ -29,76 +44,222 @@ def send_braille_pattern(pattern: str):
         print(f"❌ Unexpected error: {e}")
         return False
 
-def english_to_braille(text: str) -> list:
-    """Convert text to 6-bit Braille patterns."""
-    braille_dict = {
-        'a': '100000', 'b': '101000', 'c': '110000', 'd': '110100',
-        'e': '100100', 'f': '111000', 'g': '111100', 'h': '101100',
-        'i': '011000', 'j': '011100', 'k': '100010', 'l': '101010',
-        'm': '110010', 'n': '110110', 'o': '100110', 'p': '111010',
-        'q': '111110', 'r': '101110', 's': '011010', 't': '011110',
-        'u': '100011', 'v': '101011', 'w': '011101', 'x': '110011',
-        'y': '110111', 'z': '100111',
-        '1': '100000', '2': '101000', '3': '110000', '4': '110100',
-        '5': '100100', '6': '111000', '7': '111100', '8': '101100',
-        '9': '011000', '0': '011100',
-        '.': '010011', ',': '010000', '?': '011001', '!': '011010',
-        '-': '001001', "'": '000010', ':': '010010', ';': '011000',
-        ' ': '000000'
-    }
-
-    NUMBER_PREFIX = '001111'
-    CAPITAL_INDICATOR = '000001'
-
-    braille_output = []
-    for char in text:
-        if char.isupper():
-            braille_output.append(CAPITAL_INDICATOR)
-            char = char.lower()
-        if char.isdigit():
-            braille_output.append(NUMBER_PREFIX)
-        braille_pattern = braille_dict.get(char, '000000')
-        braille_output.append(braille_pattern)
-    
-    return braille_output
+def encode_cell_records(cells: bytes, dwells_ms) -> bytes:
+    """Pack cells into the POST /cells wire format: cell byte + little-endian uint16 dwell (ms)."""
+    if isinstance(dwells_ms, int):
+        dwells_ms = [dwells_ms] * len(cells)
+    body = bytearray()
+    for cell, dwell_ms in zip(cells, dwells_ms):
+        body.append(cell)
+        body += min(int(dwell_ms), 0xFFFF).to_bytes(2, "little")
+    return bytes(body)
+
+def send_braille_batch(cells: bytes, dwells_ms) -> int:
+    """Send cells (one byte each) with their dwell times to the Arduino in one binary request.
 
-def display_braille_on_arduino(braille_patterns: list, delay_between_chars: float = 1.0):
+    dwells_ms is either one dwell for every cell or a per-cell sequence.
+    Returns the HTTP status code, or 0 if the Arduino could not be reached.
+    A 503 means the device queue is full and the batch should be retried later.
+    """
+    try:
+        url = f"http://{ARDUINO_IP}:{PORT}/cells"
+        print(f"📤 Sending batch of {len(cells)} cells to: {url}")
+        
+        response = arduino.request("POST", url, data=encode_cell_records(cells, dwells_ms),
+                                   headers={"Content-Type": "application/octet-stream"})
+        
+        if response.status_code == 200:
+            print(f"✅ Success! Arduino response: {response.text.strip()}")
+        elif response.status_code != 503:
+            print(f"❌ HTTP Error {response.status_code}: {response.text}")
+        return response.status_code
+            
+    except requests.exceptions.Timeout:
+        print(f"❌ Timeout: Arduino didn't respond within {arduino.timeout[1]} seconds")
+        return 0
+    except requests.exceptions.ConnectionError:
+        print(f"❌ Connection Error: Can't reach Arduino at {ARDUINO_IP}:{PORT}")
+        return 0
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return 0
+
+def batch_ranges(cells: bytes, batch_size: int = BATCH_SIZE) -> list:
+    """Split cells into (start, end) batches, breaking after a blank cell (word boundary) where possible."""
+    ranges = []
+    start = 0
+    while start < len(cells):
+        end = min(start + batch_size, len(cells))
+        if end < len(cells):
+            space = cells.rfind(BLANK_CELL, start, end)
+            if space >= start:
+                end = space + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def english_to_braille(text: str, contracted: bool = True) -> bytes:
+    """Convert text to Braille cells, one byte per cell (Grade 2 contracted by default)."""
+    return braille_translator.translate(text, contracted)
+
+def clear_braille_queue() -> bool:
+    """Drop every cell still queued on the Arduino and lower all dots."""
+    try:
+        response = arduino.request("GET", f"http://{ARDUINO_IP}:{PORT}/clear")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"❌ Failed to clear Arduino queue: {e}")
+        return False
+
+def plan_display(cells: bytes, delay_between_chars=None, from_blank: bool = False):
+    """Return (cells, dwells_ms, is_blink): servo-aware timing, or a fixed delay if one is given.
+
+    from_blank plans for cells that each start from lowered dots, as GET /braille/
+    resets the servos after every request.
+    """
+    if delay_between_chars is not None:
+        return braille_scheduler.fixed_schedule(cells, int(delay_between_chars * 1000))
+    if from_blank:
+        return braille_scheduler.from_blank_schedule(cells)
+    return braille_scheduler.schedule_cells(cells)
+
+def display_braille_on_arduino(cells: bytes, delay_between_chars: float = None, batched: bool = True,
+                               progress_callback=None, cancel_event=None) -> int:
+    """Send cells to Arduino, either as word/line batches or one request per cell.
+
+    With delay_between_chars=None each cell's dwell is planned from how many servos
+    move (see braille_scheduler); otherwise every cell gets that fixed delay.
+    progress_callback(i, n) is called as cell i of n is shown. If cancel_event is set
+    the display stops early. Returns the number of cells shown.
+    """
+    if not batched:
+        return display_braille_per_cell(cells, delay_between_chars, progress_callback, cancel_event)
+
+    print(f"🎯 Displaying {len(cells)} characters on Arduino in batches...")
+    print("=" * 50)
+
+    cells, dwells_ms, is_blink = plan_display(cells, delay_between_chars)
+    total = is_blink.count(False)
+    # (estimated start time, counts for progress) of every cell sent so far;
+    # the device pops a cell off its queue when it starts showing it
+    cell_starts = []
+    started = 0
+    shown = 0
+    device_free_at = time.time()
+
+    def wait_until(deadline: float) -> bool:
+        """Sleep until deadline, reporting progress; False if cancelled."""
+        nonlocal started, shown
+        while True:
+            now = time.time()
+            while started < len(cell_starts) and cell_starts[started][0] <= now:
+                if cell_starts[started][1]:
+                    shown += 1
+                    if progress_callback:
+                        progress_callback(shown, total)
+                started += 1
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            if now >= deadline:
+                return True
+            time.sleep(min(deadline - now, 0.05))
+
+    for start, end in batch_ranges(cells):
+        batch = cells[start:end]
+        # Wait until the device queue has room for the whole batch
+        overflow = len(cell_starts) - started + len(batch) - DEVICE_QUEUE_CAPACITY
+        if overflow > 0 and not wait_until(cell_starts[started + overflow - 1][0]):
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
+        status = send_braille_batch(batch, dwells_ms[start:end])
+        retries = 0
+        while status == 503 and retries < BUSY_RETRIES:
+            # Our estimate ran ahead of the device; let it drain a cell and retry
+            if not wait_until(time.time() + dwells_ms[start] / 1000):
+                break
+            status = send_braille_batch(batch, dwells_ms[start:end])
+            retries += 1
+        if status != 200:
+            print(f"❌ Failed to send batch of {len(batch)} cells")
+            total -= is_blink[start:end].count(False)
+            continue
+
+        cell_start = max(device_free_at, time.time())
+        for i in range(start, end):
+            cell_starts.append((cell_start, not is_blink[i]))
+            cell_start += dwells_ms[i] / 1000
+        device_free_at = cell_start
+
+    # Block until the device has worked through everything, like the per-cell path
+    if not wait_until(device_free_at):
+        print("⏹️ Display cancelled")
+        clear_braille_queue()
+        return shown
+
+    print("\n" + "=" * 50)
+    print("🎉 Display sequence complete!")
+    return shown
+
+def display_braille_per_cell(cells: bytes, delay_between_chars: float = None,
+                             progress_callback=None, cancel_event=None) -> int:
     """Send each pattern to Arduino with delays."""
-    print(f"🎯 Displaying {len(braille_patterns)} characters on Arduino...")
+    print(f"🎯 Displaying {len(cells)} characters on Arduino...")
     print("=" * 50)
     
-    for i, pattern in enumerate(braille_patterns):
-        print(f"\n📍 Character {i+1}/{len(braille_patterns)}: {pattern}")
+    total = len(cells)
+    cells, dwells_ms, is_blink = plan_display(cells, delay_between_chars, from_blank=True)
+    shown = 0
+    for i, cell in enumerate(cells):
+        if cancel_event is not None and cancel_event.is_set():
+            print("⏹️ Display cancelled")
+            return shown
+
+        pattern = braille_translator.cell_to_pattern(cell)
+        print(f"\n📍 Character {i+1}/{len(cells)}: {pattern}")
         
         success = send_braille_pattern(pattern)
         if not success:
             print(f"❌ Failed to send pattern {pattern}")
             continue
+        if not is_blink[i]:
+            shown += 1
+            if progress_callback:
+                progress_callback(shown, total)
         
-        if i < len(braille_patterns) - 1:
-            print(f"⏳ Waiting {delay_between_chars} seconds before next character...")
-            time.sleep(delay_between_chars)
+        if i < len(cells) - 1:
+            delay = dwells_ms[i] / 1000
+            print(f"⏳ Waiting {delay} seconds before next character...")
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
     
     print("\n" + "=" * 50)
     print("🎉 Display sequence complete!")
+    return shown
 
-def form_brailles(text: str, display_delay: float = 1.0) -> dict:
+def form_brailles(text: str, display_delay: float = None, progress_callback=None, cancel_event=None) -> dict:
     """Convert text to Braille and display on Arduino."""
     try:
         print(f"🔤 Converting text to Braille: '{text}'")
-        braille_patterns = english_to_braille(text)
+        cells = english_to_braille(text)
+        braille = braille_translator.cells_to_unicode(cells)
         
-        print(f"📋 Generated {len(braille_patterns)} Braille patterns:")
-        for i, pattern in enumerate(braille_patterns):
-            print(f"   {i+1}. {pattern}")
+        print(f"📋 Generated {len(cells)} Braille cells: {braille}")
+        for i, cell in enumerate(cells):
+            print(f"   {i+1}. {braille_translator.cell_to_pattern(cell)}")
         
-        display_braille_on_arduino(braille_patterns, display_delay)
+        shown = display_braille_on_arduino(cells, display_delay,
+                                           progress_callback=progress_callback, cancel_event=cancel_event)
         
         return {
             "message": f"Success: '{text}' displayed on Arduino",
             "original_text": text,
-            "braille_patterns": braille_patterns,
-            "character_count": len(braille_patterns)
+            "braille": braille,
+            "character_count": len(cells),
+            "cells_shown": shown
         }
         
     except Exception as e:
@@ -0,0 +1,112 @@
+import queue
+import threading
+
+from braille_control import display_braille_on_arduino, english_to_braille
+from sentence_stream import split_sentences
+
+STOP = "stop"
+NEXT_SENTENCE = "next sentence"
+
+
+class BrailleOutputWorker:
+    """Background thread that renders text on the braille display.
+
+    Jobs wait in a bounded queue so the microphone loop never blocks on the servos.
+    stop() drops the current job and everything queued, next_sentence() skips ahead
+    to the next sentence of the current job. A job submitted with a cancel_event
+    is skipped if that event is set by the time the job comes up, so a reply the
+    user stopped can't slip in behind stop(). progress_callback(i, n) is called as
+    cell i of the job's n cells is shown.
+    """
+
+    def __init__(self, max_jobs=4, display_delay=None, progress_callback=None):
+        self.display_delay = display_delay
+        self.progress_callback = progress_callback
+        self._jobs = queue.Queue(maxsize=max_jobs)
+        self._interrupt = threading.Event()
+        self._interrupt_reason = None
+        self._busy = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def is_busy(self):
+        """True while a job is being displayed or waiting in the queue."""
+        return self._busy.is_set() or not self._jobs.empty()
+
+    def submit(self, text: str, block=False, cancel_event=None) -> bool:
+        """Queue text for display; returns False if the queue is full and block is False."""
+        try:
+            self._jobs.put((text, cancel_event), block=block)
+            return True
+        except queue.Full:
+            print("⚠️ Braille queue is full, dropping text")
+            return False
+
+    def stop(self):
+        """Cancel the job on the display and drop all queued jobs."""
+        while True:
+            try:
+                self._jobs.get_nowait()
+                self._jobs.task_done()
+            except queue.Empty:
+                break
+        self._interrupt_reason = STOP
+        self._interrupt.set()
+
+    def next_sentence(self):
+        """Skip the rest of the sentence currently on the display."""
+        self._interrupt_reason = NEXT_SENTENCE
+        self._interrupt.set()
+
+    def handle_command(self, text: str):
+        """Apply a spoken "stop" / "next sentence" command; returns the command, or None if text wasn't one."""
+        command = text.strip().lower().rstrip(".!")
+        if not self.is_busy or command not in (STOP, NEXT_SENTENCE):
+            return None
+        if command == STOP:
+            self.stop()
+        else:
+            self.next_sentence()
+        print(f"⏭️ Braille output: {command}")
+        return command
+
+    def join(self):
+        """Block until every queued job has been displayed."""
+        self._jobs.join()
+
+    def _run(self):
+        while True:
+            text, cancel_event = self._jobs.get()
+            if cancel_event is not None and cancel_event.is_set():
+                self._jobs.task_done()
+                continue
+            self._busy.set()
+            try:
+                self._display(text)
+            except Exception as e:
+                print(f"❌ Braille output error: {e}")
+            finally:
+                self._busy.clear()
+                self._jobs.task_done()
+
+    def _display(self, text: str):
+        sentences = [english_to_braille(s) for s in split_sentences(text)]
+        total = sum(len(cells) for cells in sentences)
+        offset = 0
+        # An interrupt that arrived before this job started belongs to an older job
+        self._interrupt.clear()
+
+        for cells in sentences:
+            def report(i, n, offset=offset):
+                if self.progress_callback:
+                    self.progress_callback(offset + i, total)
+
+            display_braille_on_arduino(cells, self.display_delay,
+                                       progress_callback=report, cancel_event=self._interrupt)
+            offset += len(cells)
+
+            if self._interrupt.is_set():
+                self._interrupt.clear()
+                if self._interrupt_reason == STOP:
+                    return
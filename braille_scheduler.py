@@ -0,0 +1,57 @@
+from braille_translator import BLANK
+
+# Timing model for the SG90-class servos on the display (all values in ms)
+MIN_READ_MS = 400      # Time a finger needs on a settled cell
+SERVO_MOVE_MS = 150    # Travel + settle time once any servo has to move
+PER_SERVO_MS = 25      # Extra settle time per moving servo (they share one supply)
+
+
+def moved_servos(previous: int, cell: int) -> int:
+    """Number of dots that change between two cells."""
+    return bin(previous ^ cell).count("1")
+
+
+def cell_dwell_ms(previous: int, cell: int) -> int:
+    """Dwell for a cell: reading time plus travel time for the servos that actually move."""
+    moved = moved_servos(previous, cell)
+    if moved == 0:
+        return MIN_READ_MS
+    return MIN_READ_MS + SERVO_MOVE_MS + PER_SERVO_MS * moved
+
+
+def schedule_cells(cells: bytes, previous: int = BLANK):
+    """Plan per-cell dwell times for a run of cells.
+
+    Repeated non-blank cells get a blank "blink" in between, held like any
+    other cell so the dots fully drop and the finger feels the gap. Returns
+    (cells, dwells_ms, is_blink) where cells includes the inserted blinks and
+    is_blink marks them so progress can still count the original cells.
+    """
+    scheduled = bytearray()
+    dwells_ms = []
+    is_blink = []
+    for cell in cells:
+        if cell == previous and cell != BLANK:
+            scheduled.append(BLANK)
+            dwells_ms.append(cell_dwell_ms(previous, BLANK))
+            is_blink.append(True)
+            previous = BLANK
+        scheduled.append(cell)
+        dwells_ms.append(cell_dwell_ms(previous, cell))
+        is_blink.append(False)
+        previous = cell
+    return bytes(scheduled), dwells_ms, is_blink
+
+
+def fixed_schedule(cells: bytes, dwell_ms: int):
+    """Same shape as schedule_cells, with one fixed dwell for every cell."""
+    return bytes(cells), [dwell_ms] * len(cells), [False] * len(cells)
+
+
+def from_blank_schedule(cells: bytes):
+    """Same shape as schedule_cells for a device that lowers every dot between cells.
+
+    Each cell is raised from blank, so its dwell counts every raised dot and
+    repeated cells need no blink to read as two.
+    """
+    return bytes(cells), [cell_dwell_ms(BLANK, cell) for cell in cells], [False] * len(cells)
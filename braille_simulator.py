@@ -0,0 +1,238 @@
+import queue
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from braille_scheduler import PER_SERVO_MS, SERVO_MOVE_MS, moved_servos
+from braille_translator import BLANK, pattern_to_cell
+
+# Mirrors the HTTP interface and timing of braille_arduino.cpp so braille_control.py can run without hardware
+QUEUE_CAPACITY = 64
+CELL_RECORD_SIZE = 3
+PATTERN_RE = re.compile(r"^[01]{6}$")
+
+FIRMWARE_PATTERN_DELAY = 1.0   # delay(1000) after setBraillePattern on GET /braille/
+
+
+class BrailleDeviceSimulator:
+    """Local stand-in for the Arduino braille display.
+
+    Models the firmware's timing: GET /braille/ applies a pattern, blocks for
+    delay(1000) and resets the servos after the client disconnects; cells
+    queued by POST /cells play back with their own dwell and only move the
+    servos whose dot changes. Like the firmware's single loop(), requests are
+    handled one at a time and the queue is not serviced while one is blocking.
+
+    Servo travel uses braille_scheduler's timing model, the one the host plans
+    dwells with. time_scale multiplies the modeled firmware delays (pattern delay,
+    servo travel, latency) so benchmarks can run faster than real time; dwell times sent by the
+    host are played as given. latency models the per-request cost of the Wi-Fi link.
+    Every applied cell is recorded in `applied` and every request in `requests`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, pattern_delay=FIRMWARE_PATTERN_DELAY, latency=0.0,
+                 servo_move_ms=SERVO_MOVE_MS, per_servo_ms=PER_SERVO_MS, time_scale=1.0):
+        self.pattern_delay = pattern_delay
+        self.latency = latency
+        self.servo_move_ms = servo_move_ms
+        self.per_servo_ms = per_servo_ms
+        self.time_scale = time_scale
+        self.applied = []      # (timestamp, cell byte, servos moved) for every cell the "servos" showed
+        self.requests = []     # (endpoint, seconds spent handling) for every request
+        self.undersettled = 0  # queued cells whose dwell ended before the servos finished moving
+        self.current_cell = BLANK
+        self._queue = queue.Queue(maxsize=QUEUE_CAPACITY)
+        self._lock = threading.Lock()
+        self._loop_lock = threading.Lock()  # one request or queued cell at a time, like loop()
+        self._batch_active = False
+        self._running = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def request_count(self):
+        return len(self.requests)
+
+    def start(self):
+        """Start the HTTP server and the batch playback thread."""
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._play_queue, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Shut down the server and playback thread."""
+        self._running.clear()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        """Forget recorded cells and requests, e.g. between benchmark runs."""
+        with self._lock:
+            self.applied = []
+            self.requests = []
+            self.undersettled = 0
+
+    def wait_until_idle(self, timeout=None):
+        """Block until every queued cell has been played and the servos reset."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks or self._batch_active:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def clear(self):
+        """Drop every queued cell, like GET /clear on the firmware."""
+        with self._lock:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _apply(self, cell):
+        """Move the servos to cell; returns the modeled travel time in device seconds."""
+        moved = moved_servos(self.current_cell, cell)
+        self.current_cell = cell
+        with self._lock:
+            self.applied.append((time.time(), cell, moved))
+        if moved == 0:
+            return 0.0
+        return (self.servo_move_ms + self.per_servo_ms * moved) / 1000
+
+    def _play_queue(self):
+        while self._running.is_set():
+            try:
+                cell, dwell_ms = self._queue.get(timeout=0.01)
+            except queue.Empty:
+                if self._batch_active:
+                    # Queue drained: the firmware lowers every dot
+                    with self._loop_lock:
+                        self._apply(BLANK)
+                        self._batch_active = False
+                continue
+            with self._loop_lock:
+                self._batch_active = True
+                travel = self._apply(cell)
+            if dwell_ms / 1000 < travel * self.time_scale:
+                with self._lock:
+                    self.undersettled += 1
+            time.sleep(dwell_ms / 1000)
+            self._queue.task_done()
+
+    def _enqueue_cell_records(self, body):
+        if not body or len(body) % CELL_RECORD_SIZE:
+            return -1
+        cells = []
+        for i in range(0, len(body), CELL_RECORD_SIZE):
+            if body[i] > 0x3F:
+                return -1
+            cells.append((body[i], int.from_bytes(body[i + 1:i + 3], "little")))
+        return self._enqueue_cells(cells)
+
+    def _enqueue_cells(self, cells):
+        if not cells:
+            return -1
+        # All-or-nothing, like the firmware
+        with self._lock:
+            if self._queue.qsize() + len(cells) > QUEUE_CAPACITY:
+                return 0
+            for cell in cells:
+                self._queue.put_nowait(cell)
+        return len(cells)
+
+    def _make_handler(self):
+        device = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._handle(self._route_get)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._handle(lambda: self._route_post(body))
+
+            def _handle(self, route):
+                start = time.perf_counter()
+                with device._loop_lock:
+                    device._sleep(device.latency)
+                    endpoint = route()
+                with device._lock:
+                    device.requests.append((endpoint, time.perf_counter() - start))
+
+            def _route_get(self):
+                if self.path.startswith("/braille/"):
+                    pattern = self.path[len("/braille/"):]
+                    if PATTERN_RE.match(pattern):
+                        device._apply(pattern_to_cell(pattern))
+                        device._sleep(device.pattern_delay)
+                    self._reply(200, f"OK: Pattern {pattern} applied")
+                    # After the client disconnects the firmware resets the servos
+                    if device._queue.empty() and not device._batch_active:
+                        device._apply(BLANK)
+                    return "braille"
+                if self.path == "/clear":
+                    device.clear()
+                    self._reply(200, "OK: Queue cleared")
+                    return "clear"
+                self._reply(404, "Not found")
+                return "unknown"
+
+            def _route_post(self, body):
+                if self.path == "/cells":
+                    self._reply_queued(device._enqueue_cell_records(body))
+                    return "cells"
+                self._reply(404, "Not found")
+                return "unknown"
+
+            def _reply_queued(self, queued):
+                if queued > 0:
+                    self._reply(200, f"OK: Queued {queued} cells ({device._queue.qsize()} pending)")
+                elif queued == 0:
+                    self._reply(503, f"BUSY: Queue full ({device._queue.qsize()} pending)")
+                else:
+                    self._reply(400, "ERROR: Malformed batch")
+
+            def _reply(self, status, body):
+                data = (body + "\r\n").encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    device = BrailleDeviceSimulator(port=8080).start()
+    print(f"🤖 Simulated braille device listening on http://{device.host}:{device.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        device.stop()
@@ -0,0 +1,285 @@
+import functools
+import re
+
+# Braille tables are written as dot numbers (e.g. "145" for d) and compiled once at import.
+# A cell is one byte with bit (dot - 1) set for every raised dot, the same layout as the
+# Unicode braille block, so translated text is a plain bytes buffer.
+# The debug pattern strings list the dots in servo order: 1, 4, 2, 5, 3, 6.
+SERVO_DOT_ORDER = "142536"
+UNICODE_BRAILLE_BASE = 0x2800
+
+
+def dots_to_cell(dots: str) -> int:
+    """Convert dot numbers like '145' into a cell byte like 0b011001."""
+    return sum(1 << (int(dot) - 1) for dot in dots)
+
+
+def cell_to_pattern(cell: int) -> str:
+    """Convert a cell byte into a 6-bit servo pattern like '110100' (for logs and GET /braille/)."""
+    return "".join("1" if cell & (1 << (int(dot) - 1)) else "0" for dot in SERVO_DOT_ORDER)
+
+
+def pattern_to_cell(pattern: str) -> int:
+    """Convert a 6-bit servo pattern back into a cell byte."""
+    return sum(1 << (int(dot) - 1) for bit, dot in zip(pattern, SERVO_DOT_ORDER) if bit == "1")
+
+
+def cells_to_unicode(cells: bytes) -> str:
+    """Render cells as Unicode braille (e.g. '⠓⠑⠇⠇⠕') for the debug log."""
+    return "".join(chr(UNICODE_BRAILLE_BASE + cell) for cell in cells)
+
+
+LETTER_DOTS = {
+    'a': '1', 'b': '12', 'c': '14', 'd': '145', 'e': '15', 'f': '124',
+    'g': '1245', 'h': '125', 'i': '24', 'j': '245', 'k': '13', 'l': '123',
+    'm': '134', 'n': '1345', 'o': '135', 'p': '1234', 'q': '12345', 'r': '1235',
+    's': '234', 't': '2345', 'u': '136', 'v': '1236', 'w': '2456', 'x': '1346',
+    'y': '13456', 'z': '1356',
+}
+
+PUNCTUATION_DOTS = {
+    ',': '2', ';': '23', ':': '25', '.': '256', '!': '235', '?': '236',
+    "'": '3', '-': '36', ' ': '',
+}
+
+# Digits 1-9, 0 reuse the letters a-j after a number sign
+DIGIT_LETTERS = dict(zip("1234567890", "abcdefghij"))
+
+NUMBER_SIGN = dots_to_cell('3456')
+CAPITAL_INDICATOR = dots_to_cell('6')
+GRADE1_INDICATOR = dots_to_cell('56')
+BLANK = dots_to_cell('')
+UNKNOWN = BLANK
+
+# Whole words written with a single contraction (alphabetic, strong and lower wordsigns)
+WORDSIGN_DOTS = {
+    'but': '12', 'can': '14', 'do': '145', 'every': '15', 'from': '124', 'go': '1245',
+    'have': '125', 'just': '245', 'knowledge': '13', 'like': '123', 'more': '134',
+    'not': '1345', 'people': '1234', 'quite': '12345', 'rather': '1235', 'so': '234',
+    'that': '2345', 'us': '136', 'very': '1236', 'will': '2456', 'it': '1346',
+    'you': '13456', 'as': '1356',
+    'child': '16', 'shall': '146', 'this': '1456', 'which': '156', 'out': '1256', 'still': '34',
+    'be': '23', 'enough': '26', 'were': '2356', 'his': '236', 'in': '35', 'was': '356',
+}
+
+# Letter groups contracted inside words: (dots per cell, where in the word they may appear)
+ANYWHERE, NOT_FIRST, MIDDLE, BEGINNING = "anywhere", "not_first", "middle", "beginning"
+GROUPSIGN_DOTS = {
+    # Strong contractions and groupsigns
+    'and': (['12346'], ANYWHERE), 'for': (['123456'], ANYWHERE), 'of': (['12356'], ANYWHERE),
+    'the': (['2346'], ANYWHERE), 'with': (['23456'], ANYWHERE),
+    'ch': (['16'], ANYWHERE), 'gh': (['126'], ANYWHERE), 'sh': (['146'], ANYWHERE),
+    'th': (['1456'], ANYWHERE), 'wh': (['156'], ANYWHERE), 'ed': (['1246'], ANYWHERE),
+    'er': (['12456'], ANYWHERE), 'ou': (['1256'], ANYWHERE), 'ow': (['246'], ANYWHERE),
+    'st': (['34'], ANYWHERE), 'ar': (['345'], ANYWHERE), 'ing': (['346'], NOT_FIRST),
+    # Lower groupsigns
+    'en': (['26'], ANYWHERE), 'in': (['35'], ANYWHERE),
+    'ea': (['2'], MIDDLE), 'bb': (['23'], MIDDLE), 'cc': (['25'], MIDDLE),
+    'ff': (['235'], MIDDLE), 'gg': (['2356'], MIDDLE),
+    'be': (['23'], BEGINNING), 'con': (['25'], BEGINNING), 'dis': (['256'], BEGINNING),
+    # Initial-letter contractions
+    'day': (['5', '145'], ANYWHERE), 'ever': (['5', '15'], ANYWHERE),
+    'father': (['5', '124'], ANYWHERE), 'here': (['5', '125'], ANYWHERE),
+    'know': (['5', '13'], ANYWHERE), 'lord': (['5', '123'], ANYWHERE),
+    'mother': (['5', '134'], ANYWHERE), 'name': (['5', '1345'], ANYWHERE),
+    'one': (['5', '135'], ANYWHERE), 'part': (['5', '1234'], ANYWHERE),
+    'question': (['5', '12345'], ANYWHERE), 'right': (['5', '1235'], ANYWHERE),
+    'some': (['5', '234'], ANYWHERE), 'time': (['5', '2345'], ANYWHERE),
+    'under': (['5', '136'], ANYWHERE), 'work': (['5', '2456'], ANYWHERE),
+    'young': (['5', '13456'], ANYWHERE), 'there': (['5', '2346'], ANYWHERE),
+    'character': (['5', '16'], ANYWHERE), 'through': (['5', '1456'], ANYWHERE),
+    'where': (['5', '156'], ANYWHERE), 'ought': (['5', '1256'], ANYWHERE),
+    'upon': (['45', '136'], ANYWHERE), 'word': (['45', '2456'], ANYWHERE),
+    'these': (['45', '2346'], ANYWHERE), 'those': (['45', '1456'], ANYWHERE),
+    'whose': (['45', '156'], ANYWHERE), 'cannot': (['456', '14'], ANYWHERE),
+    'had': (['456', '125'], ANYWHERE), 'many': (['456', '134'], ANYWHERE),
+    'spirit': (['456', '234'], ANYWHERE), 'world': (['456', '2456'], ANYWHERE),
+    'their': (['456', '2346'], ANYWHERE),
+    # Final-letter groupsigns
+    'ound': (['46', '145'], NOT_FIRST), 'ance': (['46', '15'], NOT_FIRST),
+    'sion': (['46', '1345'], NOT_FIRST), 'less': (['46', '234'], NOT_FIRST),
+    'ount': (['46', '2345'], NOT_FIRST), 'ence': (['56', '15'], NOT_FIRST),
+    'ong': (['56', '1245'], NOT_FIRST), 'ful': (['56', '123'], NOT_FIRST),
+    'tion': (['56', '1345'], NOT_FIRST), 'ness': (['56', '234'], NOT_FIRST),
+    'ment': (['56', '2345'], NOT_FIRST), 'ity': (['56', '13456'], NOT_FIRST),
+}
+
+_TERMINAL = "$"
+
+# Grade 2 splits text into words and numbers with the punctuation runs between them, and
+# translates each distinct word or run once; English text reuses a few hundred words
+# ASCII digits only: \d also matches e.g. Arabic-Indic and full-width digits, which have no cells
+_WORD_SPLIT_RE = re.compile(r"([A-Za-z]+(?:'[A-Za-z]+)*|[0-9]+(?:[.,][0-9]+)*)")
+WORD_CACHE_SIZE = 8192
+
+# Grade 1 runs as a few regex passes that insert indicator markers, then one bytes.translate
+_CAPITAL_MARK, _NUMBER_MARK, _GRADE1_MARK = "\x01", "\x02", "\x03"
+_CAPITAL_WORD_RE = re.compile(r"\b[A-Z]{2,}\b")
+_CAPITAL_LETTER_RE = re.compile(r"[A-Z]")
+_NUMBER_RE = re.compile(r"[0-9]+(?:[.,][0-9]+)*([a-jA-J]?)")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+_DIGITS_AS_LETTERS = str.maketrans(DIGIT_LETTERS)
+
+
+def _compile_trie(groupsigns: dict) -> dict:
+    """Build a character trie whose terminal nodes hold (cells, position rule)."""
+    root = {}
+    for letters, (dots, rule) in groupsigns.items():
+        node = root
+        for char in letters:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = (bytes(dots_to_cell(d) for d in dots), rule)
+    return root
+
+
+def _compile_grade1_table() -> bytes:
+    """Build a 256-entry ASCII -> cell table for bytes.translate."""
+    table = bytearray([UNKNOWN]) * 256
+    for char, cell in {**LETTER_CELLS, **PUNCTUATION_CELLS}.items():
+        table[ord(char)] = cell
+    table[ord(_CAPITAL_MARK)] = CAPITAL_INDICATOR
+    table[ord(_NUMBER_MARK)] = NUMBER_SIGN
+    table[ord(_GRADE1_MARK)] = GRADE1_INDICATOR
+    return bytes(table)
+
+
+LETTER_CELLS = {char: dots_to_cell(dots) for char, dots in LETTER_DOTS.items()}
+PUNCTUATION_CELLS = {char: dots_to_cell(dots) for char, dots in PUNCTUATION_DOTS.items()}
+WORDSIGN_CELLS = {word: bytes([dots_to_cell(dots)]) for word, dots in WORDSIGN_DOTS.items()}
+GROUPSIGN_TRIE = _compile_trie(GROUPSIGN_DOTS)
+GRADE1_TABLE = _compile_grade1_table()
+
+
+def _rule_allows(rule: str, start: int, end: int, length: int) -> bool:
+    if rule == ANYWHERE:
+        return True
+    if rule == NOT_FIRST:
+        return start > 0
+    if rule == MIDDLE:
+        return start > 0 and end < length
+    return start == 0 and end < length  # BEGINNING, and more letters must follow
+
+
+def _longest_groupsign(word: str, start: int):
+    """Return (cells, end) of the longest groupsign allowed at word[start:], or None."""
+    node = GROUPSIGN_TRIE
+    best = None
+    for end in range(start, len(word)):
+        node = node.get(word[end])
+        if node is None:
+            break
+        terminal = node.get(_TERMINAL)
+        if terminal and _rule_allows(terminal[1], start, end + 1, len(word)):
+            best = (terminal[0], end + 1)
+    return best
+
+
+def _capital_prefix(word: str, output: bytearray) -> bool:
+    """Emit a capitalised-word indicator; True if per-letter capitals are still needed."""
+    if len(word) > 1 and word.isupper():
+        output += bytes([CAPITAL_INDICATOR, CAPITAL_INDICATOR])
+        return False
+    return True
+
+
+def _letters(word: str, output: bytearray):
+    letter_capitals = _capital_prefix(word, output)
+    lower = word.lower()
+    i = 0
+    while i < len(lower):
+        match = _longest_groupsign(lower, i)
+        # A contraction spanning a capital is written letter by letter
+        if match and not (letter_capitals and any(c.isupper() for c in word[i + 1:match[1]])):
+            if letter_capitals and word[i].isupper():
+                output.append(CAPITAL_INDICATOR)
+            output += match[0]
+            i = match[1]
+            continue
+        if letter_capitals and word[i].isupper():
+            output.append(CAPITAL_INDICATOR)
+        output.append(LETTER_CELLS.get(lower[i], UNKNOWN))
+        i += 1
+
+
+def _word(word: str, output: bytearray, grade1_indicated: bool = False):
+    lower = word.lower()
+    if lower in WORDSIGN_CELLS and (word.islower() or word.istitle() or word.isupper()):
+        letter_capitals = _capital_prefix(word, output)
+        if letter_capitals and word[0].isupper():
+            output.append(CAPITAL_INDICATOR)
+        output += WORDSIGN_CELLS[lower]
+        return
+    if len(word) == 1 and lower not in "aio" and not grade1_indicated:
+        # A lone letter would read as a wordsign without the grade 1 indicator
+        output.append(GRADE1_INDICATOR)
+    for i, part in enumerate(word.split("'")):
+        if i:
+            output.append(PUNCTUATION_CELLS["'"])
+        _letters(part, output)
+
+
+def _number(number: str, output: bytearray):
+    output.append(NUMBER_SIGN)
+    for char in number:
+        if char in DIGIT_LETTERS:
+            output.append(LETTER_CELLS[DIGIT_LETTERS[char]])
+        else:
+            output.append(PUNCTUATION_CELLS[char])
+
+
+def _number_run(match) -> str:
+    digits = match.group(0)[:len(match.group(0)) - len(match.group(1))]
+    trailing = _GRADE1_MARK + match.group(1) if match.group(1) else ""
+    return _NUMBER_MARK + digits.translate(_DIGITS_AS_LETTERS) + trailing
+
+
+def translate_grade1(text: str) -> bytes:
+    """Uncontracted translation of a whole text with one table lookup pass."""
+    text = _NON_ASCII_RE.sub(" ", text)
+    text = _NUMBER_RE.sub(_number_run, text)
+    text = _CAPITAL_WORD_RE.sub(lambda m: _CAPITAL_MARK * 2 + m.group(0).lower(), text)
+    text = _CAPITAL_LETTER_RE.sub(lambda m: _CAPITAL_MARK + m.group(0).lower(), text)
+    return text.encode("ascii").translate(GRADE1_TABLE)
+
+
+@functools.lru_cache(maxsize=WORD_CACHE_SIZE)
+def _token_cells(token: str, after_number: bool) -> bytes:
+    """Cells for one word or number; after_number is a word written straight after a number."""
+    output = bytearray()
+    if token[0] in DIGIT_LETTERS:
+        _number(token, output)
+        return bytes(output)
+    # Letters a-j straight after a number would be read as more digits
+    terminate_number = after_number and token[0].lower() in "abcdefghij"
+    if terminate_number:
+        output.append(GRADE1_INDICATOR)
+    _word(token, output, grade1_indicated=terminate_number)
+    return bytes(output)
+
+
+@functools.lru_cache(maxsize=WORD_CACHE_SIZE)
+def _separator_cells(separator: str) -> bytes:
+    """Cells for the spaces and punctuation between two words, one per character."""
+    return bytes(PUNCTUATION_CELLS.get(char, UNKNOWN) for char in separator)
+
+
+def clear_word_cache():
+    """Forget cached word translations, e.g. to time text that hasn't been seen before."""
+    _token_cells.cache_clear()
+    _separator_cells.cache_clear()
+
+
+def translate(text: str, contracted: bool = True) -> bytes:
+    """Translate English text into one cell byte per braille cell (Grade 2 unless contracted=False)."""
+    if not contracted:
+        return translate_grade1(text)
+
+    parts = _WORD_SPLIT_RE.split(text)
+    # Odd parts are words and numbers, even parts the (possibly empty) runs around them
+    after_number = [False] * len(parts)
+    for i in range(2, len(parts) - 1, 2):
+        if not parts[i] and parts[i - 1][0] in DIGIT_LETTERS:
+            after_number[i + 1] = True
+    parts[1::2] = map(_token_cells, parts[1::2], after_number[1::2])
+    parts[0::2] = map(_separator_cells, parts[0::2])
+    return b"".join(parts)
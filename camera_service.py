@@ -0,0 +1,155 @@
+import collections
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+from latency_stats import mean, recent_samples
+
+load_dotenv()
+
+CAMERA_DEVICE_INDEX = int(os.getenv("CAMERA_DEVICE_INDEX", "1"))  # 0 built-in webcam, 1 is virtual cam
+# "device" reads CAMERA_DEVICE_INDEX; "synthetic" generates a moving test pattern, no camera needed
+CAMERA_SOURCE = os.getenv("CAMERA_SOURCE", "device")
+RING_FRAMES = 30             # about two seconds of recent frames
+WARMUP_FRAMES = 10           # discarded after opening while auto-exposure settles
+REOPEN_DELAY_SECONDS = 2
+FIRST_FRAME_TIMEOUT = 5
+MAX_FRAME_AGE = 1.0          # an older newest frame means the camera has stalled
+
+
+class SyntheticSource:
+    """A cv2.VideoCapture stand-in that generates frames: a gradient with a square moving across it."""
+
+    def __init__(self, width=640, height=480, fps=15):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = 0
+        self._next_at = time.perf_counter()
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self._background = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        # Pace reads like a real camera
+        self._next_at += 1 / self.fps
+        time.sleep(max(0.0, self._next_at - time.perf_counter()))
+        frame = self._background.copy()
+        size = self.height // 4
+        x = (self.frame_count * 8) % (self.width - size)
+        frame[size:2 * size, x:x + size] = (30, 30, 220)
+        self.frame_count += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def open_source(source=CAMERA_SOURCE, device_index=CAMERA_DEVICE_INDEX):
+    if source == "synthetic":
+        return SyntheticSource()
+    return cv2.VideoCapture(device_index)
+
+
+class CameraService:
+    """Keeps the camera open and grabs frames on a background thread into a ring buffer.
+
+    Opening a camera takes hundreds of milliseconds and its first frames are
+    often under-exposed, so the camera is opened once, the first WARMUP_FRAMES
+    are dropped, and the tools read the newest frame with latest_frame() or a
+    short burst with frames_since(). Frames are (timestamp, image) pairs with
+    time.monotonic() timestamps; images are shared and must not be modified.
+    If the camera stops delivering frames it is reopened.
+    """
+
+    def __init__(self, open_camera=open_source, ring_frames=RING_FRAMES, warmup_frames=WARMUP_FRAMES):
+        self.open_camera = open_camera
+        self.warmup_frames = warmup_frames
+        self.frames = collections.deque(maxlen=ring_frames)
+        self.frame_count = 0
+        self.failed_reads = 0
+        self.opens = 0
+        self.open_seconds = recent_samples()
+        self._condition = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the capture thread if it isn't running. Never blocks."""
+        with self._condition:
+            if self._running.is_set():
+                return
+            self._running.set()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def latest_frame(self, timeout=FIRST_FRAME_TIMEOUT):
+        """Newest (timestamp, image), waiting up to timeout for a fresh one; None if the camera has none."""
+        self.start()
+        with self._condition:
+            fresh = self._condition.wait_for(
+                lambda: self.frames and time.monotonic() - self.frames[-1][0] <= MAX_FRAME_AGE, timeout)
+            return self.frames[-1] if fresh else None
+
+    def frames_since(self, since):
+        """Buffered (timestamp, image) pairs captured after the monotonic time since, oldest first."""
+        with self._condition:
+            return [frame for frame in self.frames if frame[0] > since]
+
+    def stats(self):
+        with self._condition:
+            newest = self.frames[-1][0] if self.frames else None
+            span = self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+            fps = (len(self.frames) - 1) / span if span else 0.0
+        return {
+            "frames": self.frame_count,
+            "failed_reads": self.failed_reads,
+            "opens": self.opens,
+            "mean_open_ms": mean(self.open_seconds) * 1000,
+            "fps": fps,
+            "latest_age_ms": (time.monotonic() - newest) * 1000 if newest is not None else None,
+        }
+
+    def _run(self):
+        while self._running.is_set():
+            started_at = time.perf_counter()
+            cap = self.open_camera()
+            if not cap.isOpened():
+                print(f"❌ Could not open the camera, retrying in {REOPEN_DELAY_SECONDS}s")
+                time.sleep(REOPEN_DELAY_SECONDS)
+                continue
+            self.opens += 1
+            warmup = self.warmup_frames
+            settled = False
+            try:
+                while self._running.is_set():
+                    ret, image = cap.read()
+                    if not ret:
+                        self.failed_reads += 1
+                        print("⚠️ Camera stopped delivering frames, reopening it")
+                        break
+                    if warmup:
+                        warmup -= 1
+                        continue
+                    if not settled:
+                        self.open_seconds.append(time.perf_counter() - started_at)
+                        settled = True
+                    with self._condition:
+                        self.frames.append((time.monotonic(), image))
+                        self.frame_count += 1
+                        self._condition.notify_all()
+            finally:
+                cap.release()
+            if self._running.is_set():
+                time.sleep(REOPEN_DELAY_SECONDS)
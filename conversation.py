@@ -0,0 +1,219 @@
+import json
+import os
+import statistics
+import threading
+import time
+
+from dotenv import load_dotenv
+from google.genai import types
+
+from latency_stats import percentile, recent_samples
+
+load_dotenv()
+
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "4000"))
+SUMMARY_MAX_CHARS = 1500          # evicted turns are kept as one line each, oldest lines dropped past this
+SUMMARY_LINE_CHARS = 160
+CONTEXT_CACHE_TTL_SECONDS = 3600
+CONTEXT_CACHE_RETRY_SECONDS = 300
+# Gemini rejects cached content below a per-model minimum size; smaller prompts are sent inline
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+CHARS_PER_TOKEN = 4               # rough estimate for English, good enough for budgeting
+
+
+def content_text(content):
+    """Everything in a Content that counts toward the prompt, as text."""
+    pieces = []
+    for part in content.parts or []:
+        if part.text:
+            pieces.append(part.text)
+        if part.function_call:
+            pieces.append(f"{part.function_call.name}({json.dumps(part.function_call.args or {})})")
+        if part.function_response:
+            pieces.append(json.dumps(part.function_response.response or {}))
+    return " ".join(pieces)
+
+
+def estimate_tokens(contents):
+    return sum(len(content_text(c)) // CHARS_PER_TOKEN + 4 for c in contents)
+
+
+class ConversationStore:
+    """Recent turns of the conversation, kept under a token budget.
+
+    A turn is the user's message plus everything that followed it: function
+    calls, function responses and the reply. When the history outgrows
+    token_budget the oldest turns are folded into a short running summary
+    ("User: ... | used describe_image | Assistant: ...") that is sent ahead of
+    the remaining turns. The turn in progress is never evicted.
+    """
+
+    def __init__(self, token_budget=CONVERSATION_TOKEN_BUDGET, summary_max_chars=SUMMARY_MAX_CHARS):
+        self.token_budget = token_budget
+        self.summary_max_chars = summary_max_chars
+        self.turns = []
+        self.summary_lines = []
+        self.evicted_turns = 0
+        self.requests = recent_samples()  # one dict per recent model request, see record_request()
+        self.request_count = 0
+        self._current = None
+
+    def start_turn(self, text):
+        """Begin a turn with the user's message and return the contents to send."""
+        if self._current is not None:
+            self.end_turn()
+        self._current = [types.Content(role="user", parts=[types.Part(text=text)])]
+        return self.contents()
+
+    def add(self, content):
+        """Add a function call, function response or reply to the current turn."""
+        self._current.append(content)
+
+    def end_turn(self, reply_text=""):
+        if self._current is None:
+            return
+        if reply_text.strip():
+            self._current.append(types.Content(role="model", parts=[types.Part(text=reply_text.strip())]))
+        self.turns.append(self._current)
+        self._current = None
+        self._evict()
+
+    def contents(self):
+        """Summary, kept turns and the turn in progress, ready for generate_content."""
+        contents = []
+        if self.summary_lines:
+            contents.append(types.Content(role="user", parts=[types.Part(
+                text="Earlier in this conversation:\n" + "\n".join(self.summary_lines))]))
+            contents.append(types.Content(role="model", parts=[types.Part(text="Noted.")]))
+        for turn in self.turns:
+            contents.extend(turn)
+        contents.extend(self._current or [])
+        return contents
+
+    def record_request(self, contents, seconds, first_output_seconds=None, usage=None):
+        """Log one model request: estimated prompt size, billed/cached tokens and latency."""
+        entry = {
+            "estimated_prompt_tokens": estimate_tokens(contents),
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "cached_tokens": getattr(usage, "cached_content_token_count", None),
+            "seconds": seconds,
+            "first_output_seconds": first_output_seconds,
+        }
+        self.requests.append(entry)
+        self.request_count += 1
+        print(f"📏 Prompt ~{entry['estimated_prompt_tokens']} tokens "
+              f"({entry['prompt_tokens'] or '?'} billed, {entry['cached_tokens'] or 0} cached), "
+              f"{seconds:.2f}s" + (f", first output {first_output_seconds:.2f}s" if first_output_seconds else ""))
+
+    def stats(self):
+        requests = list(self.requests)
+        seconds = [r["seconds"] for r in requests]
+        return {
+            "turns_kept": len(self.turns),
+            "turns_evicted": self.evicted_turns,
+            "history_tokens": estimate_tokens(self.contents()),
+            "requests": self.request_count,
+            "mean_prompt_tokens": statistics.mean(r["estimated_prompt_tokens"] for r in requests) if requests else 0,
+            "p50_seconds": percentile(seconds, 0.5),
+            "p95_seconds": percentile(seconds, 0.95),
+        }
+
+    def _evict(self):
+        while len(self.turns) > 1 and estimate_tokens(self.contents()) > self.token_budget:
+            self.summary_lines.append(self._summarize(self.turns.pop(0)))
+            self.evicted_turns += 1
+            while len("\n".join(self.summary_lines)) > self.summary_max_chars and len(self.summary_lines) > 1:
+                self.summary_lines.pop(0)
+        # The summary counts toward the budget too
+        while self.summary_lines and estimate_tokens(self.contents()) > self.token_budget:
+            self.summary_lines.pop(0)
+
+    @staticmethod
+    def _summarize(turn):
+        user = next((c.parts[0].text for c in turn if c.role == "user" and c.parts and c.parts[0].text), "")
+        tools = [p.function_call.name for c in turn for p in c.parts or [] if p.function_call]
+        reply = next((content_text(c) for c in reversed(turn) if c.role == "model" and content_text(c)
+                      and not any(p.function_call for p in c.parts or [])), "")
+        line = f"User: {user}"
+        if tools:
+            line += f" | used {', '.join(tools)}"
+        if reply:
+            line += f" | Assistant: {reply}"
+        return line if len(line) <= SUMMARY_LINE_CHARS else line[:SUMMARY_LINE_CHARS - 3] + "..."
+
+
+class ContextCache:
+    """The system instruction and tool declarations, stored once as Gemini cached content.
+
+    config() returns a GenerateContentConfig that references the cache instead of
+    resending the static prompt. The cache is created and its TTL renewed on a
+    background thread, never on the request path; until it exists, after it has
+    expired, or when creating it fails (retried after CONTEXT_CACHE_RETRY_SECONDS),
+    config() falls back to the inline config. A prompt below
+    CONTEXT_CACHE_MIN_TOKENS is never cached.
+    """
+
+    def __init__(self, client, model, system_instruction, tools, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS):
+        self.client = client
+        self.model = model
+        self.system_instruction = system_instruction
+        self.tools = tools
+        self.ttl_seconds = ttl_seconds
+        self.name = None
+        self.expires_at = 0.0
+        self.retry_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        tokens = self.prompt_tokens()
+        self.disabled = tokens < CONTEXT_CACHE_MIN_TOKENS
+        if self.disabled:
+            print(f"🗄️ System prompt is ~{tokens} tokens, below the {CONTEXT_CACHE_MIN_TOKENS}-token cache minimum; sending it inline")
+
+    def prompt_tokens(self):
+        """Rough size of the static prompt: system instruction plus tool declarations."""
+        declarations = "".join(tool.model_dump_json(exclude_none=True) for tool in self.tools or [])
+        return (len(self.system_instruction) + len(declarations)) // CHARS_PER_TOKEN
+
+    def start(self):
+        """Create the cache in the background so it is ready before the first request."""
+        self._start_refresh()
+
+    def config(self):
+        now = time.time()
+        if now > self.expires_at - 60:
+            self._start_refresh()
+        if self.name and now < self.expires_at:
+            return types.GenerateContentConfig(cached_content=self.name)
+        return types.GenerateContentConfig(tools=self.tools, system_instruction=self.system_instruction)
+
+    def _start_refresh(self):
+        with self._lock:
+            if self.disabled or self._refreshing or time.time() < self.retry_at:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        ttl = f"{self.ttl_seconds}s"
+        try:
+            if self.name and time.time() < self.expires_at:
+                self.client.caches.update(name=self.name, config=types.UpdateCachedContentConfig(ttl=ttl))
+            else:
+                cache = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="vraille-assistant",
+                        system_instruction=self.system_instruction,
+                        tools=self.tools,
+                        ttl=ttl,
+                    ),
+                )
+                self.name = cache.name
+                print(f"🗄️ Cached system prompt and tools as {self.name}")
+            self.expires_at = time.time() + self.ttl_seconds
+        except Exception as e:
+            # An expired cache is recreated on the next attempt rather than renewed
+            print(f"⚠️ Context caching unavailable, sending the system prompt inline: {e}")
+            self.retry_at = time.time() + CONTEXT_CACHE_RETRY_SECONDS
+        finally:
+            self._refreshing = False
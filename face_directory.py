@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FACEDB_REFRESH_SECONDS = float(os.getenv("FACEDB_REFRESH_SECONDS", "300"))
+# Column the incremental refresh asks for newer rows by; full reloads if the table doesn't have it
+FACEDB_UPDATED_COLUMN = os.getenv("FACEDB_UPDATED_COLUMN", "created_at")
+FULL_RELOAD_EVERY = 12       # refreshes; a full reload also drops deleted and renamed rows
+
+
+class FaceDirectory:
+    """The Supabase facedb table (face_id -> name), held in memory.
+
+    start() bulk-loads the table and refreshes it on a background thread every
+    refresh_seconds, asking only for rows whose updated_column is newer than the
+    last one seen. lookup() is a dict hit; a face_id that isn't loaded yet (e.g.
+    enrolled since the last refresh) falls back to a single-row query.
+    """
+
+    def __init__(self, endpoint, refresh_seconds=FACEDB_REFRESH_SECONDS, updated_column=FACEDB_UPDATED_COLUMN):
+        """endpoint is an api_clients.ApiEndpoint for the Supabase project."""
+        self.endpoint = endpoint
+        self.refresh_seconds = refresh_seconds
+        self.updated_column = updated_column
+        self.names = {}
+        self.last_updated = None
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.not_found = 0
+        self.refreshes = 0
+        self.load_seconds = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.endpoint.base_url:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def lookup(self, face_id):
+        """Name for a Face++ face_token, or None if no row has it."""
+        name = self.names.get(face_id)
+        if name is not None:
+            self.hits += 1
+            return name
+        self.misses += 1
+        rows = self._query(f"face_id=eq.{face_id}")
+        if not rows:
+            self.not_found += 1
+            return None
+        self.names[face_id] = rows[0]["name"]
+        return rows[0]["name"]
+
+    def load(self):
+        """Replace the map with the whole table."""
+        started_at = time.perf_counter()
+        rows = self._query()
+        self.names = {row["face_id"]: row["name"] for row in rows}
+        self._track_updated(rows)
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started_at
+        print(f"👤 Loaded {len(self.names)} faces from facedb in {self.load_seconds:.2f}s")
+
+    def refresh(self):
+        """Fetch rows changed since the last load or refresh."""
+        self.refreshes += 1
+        if not self.updated_column or self.last_updated is None or self.refreshes % FULL_RELOAD_EVERY == 0:
+            self.load()
+            return
+        rows = self._query(f"{self.updated_column}=gt.{quote(self.last_updated)}")
+        for row in rows:
+            self.names[row["face_id"]] = row["name"]
+        self._track_updated(rows)
+        if rows:
+            print(f"👤 {len(rows)} new or changed faces in facedb")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "faces": len(self.names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_found": self.not_found,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "load_seconds": self.load_seconds,
+        }
+
+    def _run(self):
+        try:
+            self.load()
+        except Exception as e:
+            print(f"⚠️ Could not preload facedb, looking faces up one by one: {e}")
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ facedb refresh failed: {e}")
+
+    def _query(self, row_filter=None):
+        columns = "face_id,name" + (f",{self.updated_column}" if self.updated_column else "")
+        path = f"/rest/v1/facedb?select={columns}" + (f"&{row_filter}" if row_filter else "")
+        response = self.endpoint.request("GET", path)
+        if response.status_code == 400 and self.updated_column and self.updated_column in response.text:
+            print(f"⚠️ facedb has no {self.updated_column} column, refreshing with full reloads")
+            self.updated_column = None
+            return self._query(row_filter)
+        if response.status_code != 200:
+            raise RuntimeError(f"Supabase query failed with status {response.status_code}: {response.text}")
+        return response.json()
+
+    def _track_updated(self, rows):
+        if self.updated_column:
+            stamps = [row[self.updated_column] for row in rows if row.get(self.updated_column)]
+            if stamps:
+                self.last_updated = max(stamps + ([self.last_updated] if self.last_updated else []))
@@ -0,0 +1,139 @@
+import os
+import time
+
+import cv2
+from dotenv import load_dotenv
+
+from latency_stats import mean, recent_samples
+
+load_dotenv()
+
+# Longest image side and JPEG quality sent to each camera tool's vision API
+TOOL_IMAGE_TARGETS = {
+    "read_text": {"max_side": 1600, "quality": 90},               # small print needs the pixels
+    "describe_infront_of_me": {"max_side": 768, "quality": 75},   # a scene survives downscaling
+    "recognize_face": {"max_side": 480, "quality": 85, "crop_face": True},
+}
+DEFAULT_IMAGE_TARGET = {"max_side": 1024, "quality": 80}
+FACE_MARGIN = 0.4            # added around a detected face on each side, as a fraction of its size
+ANALYSIS_SIDE = 640          # sharpness and face detection run on a copy this size; full-size is ~10x slower
+FACE_SEARCH_FRAMES = 3       # sharpest frames of a burst searched for a face before giving up
+# No face in any of them answers "nobody there" without calling face search (FACE_GATE=0 uploads the frame anyway)
+FACE_GATE = os.getenv("FACE_GATE", "1") != "0"
+# Assumed uplink, to turn bytes saved into seconds saved
+UPLOAD_KBPS = float(os.getenv("UPLOAD_KBPS", "2000"))
+
+face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def sharpness(image):
+    """Variance of the Laplacian: low for motion-blurred or out-of-focus frames."""
+    gray = cv2.cvtColor(downscale(image, ANALYSIS_SIDE), cv2.COLOR_BGR2GRAY)
+    return cv2.Laplacian(gray, cv2.CV_64F).var()
+
+
+def largest_face(image):
+    """(x, y, w, h) of the largest frontal face in image coordinates, or None."""
+    small = downscale(image, ANALYSIS_SIDE)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(32, 32))
+    if len(faces) == 0:
+        return None
+    scale = image.shape[1] / small.shape[1]
+    return tuple(int(v * scale) for v in max(faces, key=lambda f: f[2] * f[3]))
+
+
+def crop_face(image, face, margin=FACE_MARGIN):
+    x, y, w, h = face
+    height, width = image.shape[:2]
+    left, top = max(0, int(x - margin * w)), max(0, int(y - margin * h))
+    right, bottom = min(width, int(x + w + margin * w)), min(height, int(y + h + margin * h))
+    return image[top:bottom, left:right]
+
+
+def downscale(image, max_side):
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+class FramePreparer:
+    """Turns a burst of camera frames into the image a tool uploads.
+
+    prepare() keeps the sharpest frame of the burst (the camera is hand-held,
+    so some frames are motion-blurred), crops it to the face for face search,
+    downscales it to the tool's max_side and encodes it at the tool's quality.
+    It returns (jpeg, image), image being the pixels the JPEG encodes, for
+    callers that key a cache on what is actually uploaded. For face search it
+    returns (None, None) when none of the FACE_SEARCH_FRAMES
+    sharpest frames shows a face, so the caller can answer without uploading.
+    Each call is compared with what used to be sent (the full frame at
+    default quality) and the bytes and estimated upload seconds saved are
+    logged and totalled in stats(). The full frame's size is estimated from its
+    pixel count at the sent JPEG's bytes per pixel; encoding it just for the log
+    would cost ~10 ms per 1080p frame.
+    """
+
+    def __init__(self, targets=TOOL_IMAGE_TARGETS, upload_kbps=UPLOAD_KBPS):
+        self.targets = targets
+        self.upload_kbps = upload_kbps
+        self.prepared = 0
+        self.face_crops = 0
+        self.no_face = 0
+        self.detect_seconds = recent_samples()
+        self.bytes_full = 0
+        self.bytes_sent = 0
+        self.prepare_seconds = recent_samples()
+
+    def prepare(self, tool, frames):
+        started_at = time.perf_counter()
+        target = self.targets.get(tool, DEFAULT_IMAGE_TARGET)
+        ranked = sorted(frames, key=sharpness, reverse=True) if len(frames) > 1 else frames
+        frame = image = ranked[0]
+        if target.get("crop_face"):
+            detect_started_at = time.perf_counter()
+            face = None
+            for candidate in ranked[:FACE_SEARCH_FRAMES]:
+                face = largest_face(candidate)
+                if face is not None:
+                    frame = candidate
+                    break
+            self.detect_seconds.append(time.perf_counter() - detect_started_at)
+            if face is not None:
+                image = crop_face(frame, face)
+                self.face_crops += 1
+            elif FACE_GATE:
+                self.no_face += 1
+                print(f"🙂 {tool}: no face in the {min(len(ranked), FACE_SEARCH_FRAMES)} sharpest frames, not uploading")
+                return None, None
+        image = downscale(image, target["max_side"])
+        _, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, target["quality"]])
+        self.prepare_seconds.append(time.perf_counter() - started_at)
+
+        full = int(len(jpeg) * frame.shape[0] * frame.shape[1] / (image.shape[0] * image.shape[1]))
+        self.prepared += 1
+        self.bytes_full += full
+        self.bytes_sent += len(jpeg)
+        print(f"🖼️ {tool}: sharpest of {len(frames)} frames, {frame.shape[1]}x{frame.shape[0]} -> "
+              f"{image.shape[1]}x{image.shape[0]}, ~{full // 1024} KB -> {len(jpeg) // 1024} KB "
+              f"(~{self.upload_seconds(full - len(jpeg)):.2f}s upload saved)")
+        return jpeg, image
+
+    def upload_seconds(self, size):
+        # Images are uploaded base64-encoded, 4 bytes for every 3
+        return size * 4 / 3 * 8 / (self.upload_kbps * 1000)
+
+    def stats(self):
+        return {
+            "prepared": self.prepared,
+            "face_crops": self.face_crops,
+            "no_face": self.no_face,
+            "mean_detect_ms": mean(self.detect_seconds) * 1000,
+            "bytes_full": self.bytes_full,
+            "bytes_sent": self.bytes_sent,
+            "payload_ratio": self.bytes_sent / self.bytes_full if self.bytes_full else 0.0,
+            "upload_seconds_saved": self.upload_seconds(self.bytes_full - self.bytes_sent),
+            "mean_prepare_ms": mean(self.prepare_seconds) * 1000,
+        }
@@ -0,0 +1,100 @@
+import re
+import statistics
+import time
+
+from latency_stats import mean, recent_samples
+from tool_declarations import ALL_TOOL_DECLARATIONS
+from tool_functions import AVAILABLE_FUNCTIONS
+
+# Whole-utterance command patterns per tool. An utterance is routed locally only
+# if it matches one of these completely (after dropping politeness and filler),
+# so anything longer or less certain, e.g. "read the sign and tell me if it's
+# open", still goes to the model.
+INTENT_PATTERNS = {
+    "braille_mode_on": [
+        r"braille( mode)? on",
+        r"(turn|switch) on braille( mode)?",
+        r"(turn|switch) braille( mode)? on",
+        r"(switch|change|go) to braille( mode)?",
+        r"(enable|start|activate) braille( mode)?",
+    ],
+    "braille_mode_off": [
+        r"braille( mode)? off",
+        r"(turn|switch) off braille( mode)?",
+        r"(turn|switch) braille( mode)? off",
+        r"(switch|change|go) (back )?to (voice|speech)( mode)?",
+        r"(disable|stop|deactivate|exit) braille( mode)?",
+    ],
+    "describe_infront_of_me": [
+        r"what('s| is) (in front of me|around me|ahead( of me)?)",
+        r"what (do|can) you see",
+        r"describe (what('s| is) in front of me|what you see|the (room|scene|view)|my surroundings|(it|this|that))",
+        r"where am i",
+    ],
+    "recognize_face": [
+        r"who('s| is) (this|that|it|in front of me)( person)?",
+        r"who am i (looking at|talking to)",
+        r"(recognize|identify) (this|that|the) (face|person)",
+    ],
+    "read_text": [
+        r"read (this|that|it|the (text|sign|label|menu|page|screen|document)|this (sign|label|menu|page))( out)?( (for|to) me)?",
+        r"what does (this|that|the|it) ((sign|label|menu|page|screen|text) )?say",
+    ],
+}
+FILLER_RE = re.compile(r"^((hey|ok|okay|please|can you|could you|would you|now|just)\s+)+|(\s+(please|now|for me))+$")
+
+
+def normalize(text):
+    text = re.sub(r"[^a-z' ]+", " ", text.lower())
+    text = " ".join(text.split())
+    return FILLER_RE.sub("", text).strip()
+
+
+class IntentRouter:
+    """Dispatches obvious commands straight to a tool, skipping the model.
+
+    Only tools that are both declared to the model and implemented in
+    AVAILABLE_FUNCTIONS are routed. Misses are counted so the hit rate can be
+    reported; record_model_tool_turn() tells the router what a model-dispatched
+    tool turn cost, which is what every local hit saves.
+    """
+
+    def __init__(self, patterns=INTENT_PATTERNS):
+        declared = {d["name"] for d in ALL_TOOL_DECLARATIONS}
+        self.patterns = [
+            (name, re.compile(f"(?:{'|'.join(alternatives)})"))
+            for name, alternatives in patterns.items()
+            if name in declared and name in AVAILABLE_FUNCTIONS
+        ]
+        self.hits = 0
+        self.misses = 0
+        self.match_seconds = recent_samples()
+        self.model_tool_turn_seconds = recent_samples()
+
+    def route(self, text):
+        """Name of the tool text unambiguously asks for, or None to ask the model."""
+        started_at = time.perf_counter()
+        command = normalize(text)
+        matches = {name for name, pattern in self.patterns if pattern.fullmatch(command)}
+        self.match_seconds.append(time.perf_counter() - started_at)
+        if len(matches) != 1:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return matches.pop()
+
+    def record_model_tool_turn(self, seconds):
+        """Time the model spent choosing a tool and phrasing its result, for a turn routed the slow way."""
+        self.model_tool_turn_seconds.append(seconds)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        model_turn = statistics.median(self.model_tool_turn_seconds) if self.model_tool_turn_seconds else None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "mean_match_ms": mean(self.match_seconds) * 1000,
+            "model_tool_turn_seconds": model_turn,
+            "estimated_seconds_saved": self.hits * model_turn if model_turn is not None else None,
+        }
@@ -0,0 +1,25 @@
+import collections
+
+# Timings kept per series for the mean / p95 in the stats() of each component; older ones
+# are dropped, so memory and the cost of a stats() call stay flat over a long session
+LATENCY_SAMPLES = 1000
+
+
+def recent_samples(maxlen=LATENCY_SAMPLES):
+    """An empty series that keeps only its latest maxlen values."""
+    return collections.deque(maxlen=maxlen)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile (fraction=0.95 for p95) of values, or 0.0 if there are none.
+
+    values is copied by sorted() in one step, so another thread may keep appending to it.
+    """
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+
+def mean(values):
+    """Mean of values, or 0.0 if there are none."""
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
@@ -1,25 +1,102 @@
 from google import genai
 from google.genai import types
+import asyncio
+import functools
 import os
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 import speech_recognition as sr
 from vapiwebsockettts import VapiWebSocketTTS
+from audio_output import AudioSink
+from tts_cache import SpeechCache
 from tool_declarations import ALL_TOOL_DECLARATIONS
-from tool_functions import AVAILABLE_FUNCTIONS
+from tool_functions import AVAILABLE_FUNCTIONS, camera, face_directory, frame_preparer, scene_cache
 import cv2
 import pyaudio
-from braille_control import form_brailles
+from braille_output import STOP, BrailleOutputWorker
+from sentence_stream import SentenceSplitter, split_sentences
+from speech_capture import SpeechCapture
+from speech_backends import FailoverRecognizer, configured_backends
+from noise_calibration import load_calibration, save_calibration
+from conversation import ContextCache, ConversationStore
+from intent_router import IntentRouter
+from tool_rendering import ERROR_REPLY, REPHRASE, ToolRenderer
+from tool_runner import ToolRunner
+from assistant_engine import AssistantEngine, Stage
+from api_clients import endpoint_stats, prewarm_all
 
 # Load environment variables from .env file
 load_dotenv()
 
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+MAX_TOOL_ROUNDS = 4  # follow-up turns in which the model may call more tools before it must answer
+# Speak / emboss each sentence as soon as the model has generated it (STREAM_RESPONSES=0 waits for the whole reply)
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") != "0"
+
 # braille mode
 braille_mode_on = False
 
+# Braille output runs on its own thread so the microphone keeps listening
+def report_braille_progress(i, n):
+    if i == n or i % 10 == 0:
+        print(f"⠿ Braille progress: cell {i}/{n}")
+
+braille_worker = BrailleOutputWorker(progress_callback=report_braille_progress)
+
 # Initialize Vapi WebSocket TTS
 vapi_tts = None
+# One output device for the whole run (set AUDIO_OUTPUT_DEVICE_INDEX to pick the speaker)
+audio_sink = AudioSink()
+if not audio_sink.start():
+    audio_sink = None
+
+# Phrases said often enough to synthesize once at startup and replay from the cache
+HOT_PHRASES = [
+    "Braille mode is now ON.",
+    "Braille mode is now OFF.",
+    "I don't recognize this person.",
+    "I don't see anyone in front of you.",
+    "Could not access the camera.",
+    ERROR_REPLY,
+]
+speech_cache = SpeechCache()
+
+# Open the camera now so it has settled exposure before the first camera tool
+camera.start()
+
+def warm_up_connections():
+    # DNS, TCP and TLS to the vision, face and database APIs before the first tool call
+    started_at = time.perf_counter()
+    warmed = prewarm_all()
+    print(f"🌐 Pre-warmed {', '.join(warmed) or 'no'} connections in {time.perf_counter() - started_at:.2f}s")
+
+threading.Thread(target=warm_up_connections, daemon=True).start()
+# Known faces are loaded once and refreshed in the background, so a match needs no database query
+face_directory.start()
+
+def warm_up_tts():
+    # Open the TTS call now so the first answer doesn't pay for call setup
+    vapi_tts.start_session()
+
+def prerender_hot_phrases():
+    # On a session of its own, so the first real answer never queues behind a prerender
+    prerenderer = VapiWebSocketTTS(os.getenv("VAPI_PRIVATE_API_KEY"), cache=speech_cache, name="vapi-prerender")
+    try:
+        rendered = prerenderer.prerender(HOT_PHRASES)
+        if rendered:
+            print(f"💾 Pre-rendered {rendered} hot phrases")
+    finally:
+        prerenderer.close()
+
 if os.getenv("VAPI_PRIVATE_API_KEY"):
-    vapi_tts = VapiWebSocketTTS(os.getenv("VAPI_PRIVATE_API_KEY"))
+    vapi_tts = VapiWebSocketTTS(os.getenv("VAPI_PRIVATE_API_KEY"), audio_sink=audio_sink, cache=speech_cache)
+    threading.Thread(target=warm_up_tts, daemon=True).start()
+    threading.Thread(target=prerender_hot_phrases, daemon=True).start()
+
+# Set while the assistant is talking so the microphone doesn't transcribe it
+speaking = threading.Event()
 
 def speak_with_vapi(text: str):
     print(f"Speaking: {text}")
@@ -28,10 +105,97 @@ def speak_with_vapi(text: str):
         print("❌ Vapi WebSocket TTS not available.")
         return
     
-    success = vapi_tts.speak(text)
+    speaking.set()
+    try:
+        success = vapi_tts.speak(text)
+    finally:
+        speaking.clear()
     if not success:
         print("🔄 Falling back to alternative TTS...")
 
+def output_sentence(item):
+    """Say or emboss one (sentence, cancelled) of a reply, depending on the mode; skipped once the reply is stopped."""
+    text, cancelled = item
+    if cancelled.is_set():
+        return
+    if braille_mode_on:
+        braille_worker.submit(text, block=True, cancel_event=cancelled)
+    else:
+        speak_with_vapi(text)
+
+def generate_response(client, contents, config, output=None, conversation=None):
+    """Ask Gemini for a reply and hand its text to output as it is produced.
+
+    In streaming mode every sentence goes to output as soon as it is complete,
+    otherwise the whole reply is output at once. output=None only prints the reply.
+    Prompt size and latency are recorded in conversation, if given.
+    Returns (function_calls, text) with every function call the model requested.
+    """
+    function_calls = []
+    text = ""
+    usage = None
+    started_at = time.perf_counter()
+    first_output_at = None
+    if STREAM_RESPONSES:
+        splitter = SentenceSplitter()
+        stream = client.models.generate_content_stream(model=GEMINI_MODEL, contents=contents, config=config)
+        for chunk in stream:
+            usage = chunk.usage_metadata or usage
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            first_output_at = first_output_at or time.perf_counter()
+            for part in chunk.candidates[0].content.parts or []:
+                if part.function_call:
+                    function_calls.append(part.function_call)
+                elif part.text:
+                    text += part.text
+                    for sentence in splitter.feed(part.text):
+                        if output:
+                            output(sentence)
+        remaining = splitter.flush()
+    else:
+        response = client.models.generate_content(model=GEMINI_MODEL, contents=contents, config=config)
+        usage = response.usage_metadata
+        for part in response.candidates[0].content.parts or []:
+            if part.function_call:
+                function_calls.append(part.function_call)
+            elif part.text:
+                text += part.text
+        remaining = [text.strip()] if text.strip() else []
+
+    if output:
+        for sentence in remaining:
+            output(sentence)
+    if text.strip():
+        print(f"Assistant: {text.strip()}")
+    if conversation:
+        conversation.record_request(contents, time.perf_counter() - started_at,
+                                    first_output_at and first_output_at - started_at, usage)
+    return function_calls, text
+
+def run_tool(function_name: str, function_args: dict) -> dict:
+    """Execute a tool and, for the braille toggles, switch the output mode."""
+    global braille_mode_on
+    result = AVAILABLE_FUNCTIONS[function_name](**function_args)
+    print(f"Function result: {result['message']}")
+    # Switch modes before the reply is output so it goes to the new output
+    if function_name == "braille_mode_on":
+        braille_mode_on = True
+    if function_name == "braille_mode_off":
+        braille_mode_on = False
+    return result
+
+def function_response_content(function_name: str, result: dict):
+    return types.Content(
+        role="function",
+        parts=[types.Part(
+            function_response=types.FunctionResponse(
+                name=function_name,
+                response=result
+            )
+        )]
+    )
+
 
 # Define function declarations for the two tools
 # describe_image_declaration = {
@@ -81,7 +245,7 @@ def speak_with_vapi(text: str):
 
 #     return {"message": response.message.content[0].text}
 
-def continuous_speech_to_text(device_index=None):
+def continuous_speech_to_text(device_index=None, device_name=None):
     """
     Continuous speech recognition with microphone selection
     """
@@ -103,7 +267,16 @@ def continuous_speech_to_text(device_index=None):
     6. Offer alternatives or related help when you can't do exactly what's asked
     7. When someone asks about locations or directions, suggest using the camera to see signs or landmarks
     8. Be encouraging and supportive in your responses"""
-    config = types.GenerateContentConfig(tools=tools, system_instruction=system_instruction)
+    # The static prompt is cached model-side; recent turns are resent under a token budget
+    context_cache = ContextCache(client, GEMINI_MODEL, system_instruction, tools)
+    context_cache.start()
+    conversation = ConversationStore()
+    # Obvious commands ("braille mode on", "who is this?") skip the model entirely
+    intent_router = IntentRouter()
+    # Tool results that are already speakable skip the second model call (TOOL_RENDERING to configure)
+    tool_renderer = ToolRenderer()
+    # Every function call of a turn runs at once, each with its own timeout
+    tool_runner = ToolRunner(run_tool, AVAILABLE_FUNCTIONS)
     
     # Initialize microphone with specified device index
     if device_index is not None:
@@ -113,120 +286,195 @@ def continuous_speech_to_text(device_index=None):
         microphone = sr.Microphone()
         print("Using default microphone")
     
-    # Adjust for ambient noise
-    print("Adjusting for ambient noise... Please wait.")
-    try:
-        with microphone as source:
-            recognizer.adjust_for_ambient_noise(source, duration=2)
-    except Exception as e:
-        print(f"Error accessing microphone: {e}")
-        print("Please check if the microphone is connected and not being used by another application.")
-        return
+    # Reuse this microphone's saved calibration; the capture keeps adapting it while running
+    calibration_key = device_name or "default"
+    saved_threshold = load_calibration(calibration_key)
+    if saved_threshold is not None:
+        recognizer.energy_threshold = saved_threshold
+        print(f"Loaded ambient noise calibration for {calibration_key} (threshold {saved_threshold:.0f})")
+    else:
+        # Adjust for ambient noise
+        print("Adjusting for ambient noise... Please wait.")
+        try:
+            with microphone as source:
+                recognizer.adjust_for_ambient_noise(source, duration=2)
+        except Exception as e:
+            print(f"Error accessing microphone: {e}")
+            print("Please check if the microphone is connected and not being used by another application.")
+            return
+        save_calibration(calibration_key, recognizer.energy_threshold)
     
+    # Capture and VAD segmentation run on their own threads, so the next phrase
+    # is recorded while this one is recognized and answered
+    capture = SpeechCapture(microphone, energy_threshold=recognizer.energy_threshold, pause_event=speaking)
+    if not capture.start():
+        print("Error accessing microphone: capture did not start")
+        return
+    # Google first, failing over to the offline engine (VOSK_MODEL_PATH) on errors or slow replies
+    speech_to_text = FailoverRecognizer(configured_backends(recognizer))
+    # The conversation has one turn in progress at a time: the reason stage waits
+    # until the tools stage has finished the previous turn
+    turn_lock = threading.Semaphore(1)
+    # Set by "stop": the rest of the latest turn's reply is dropped, queued or still streaming
+    reply_cancelled = threading.Event()
+
+    def listen():
+        """mic stage: the next utterance from the capture threads, if any."""
+        try:
+            return capture.segments.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def transcribe(audio):
+        """stt stage: utterance -> text."""
+        try:
+            text = speech_to_text.recognize(audio)
+        except sr.UnknownValueError:
+            return None  # Ignore unclear audio - don't print anything
+        if not text.strip():
+            return None
+        print(f">> {text}")
+        # "stop" / "next sentence" control the braille display directly
+        command = braille_worker.handle_command(text)
+        if command == STOP:
+            stop_reply()
+        if command:
+            return None
+        return text
+
+    def stop_reply():
+        """End the reply in progress: sentences still to stream in and those waiting for output."""
+        reply_cancelled.set()
+        dropped = engine.drain("output")
+        if dropped:
+            print(f"⏹️ Dropped {dropped} queued sentences")
+
+    def emit_sentence(turn, sentence):
+        if not turn["cancelled"].is_set():
+            engine.emit("output", (sentence, turn["cancelled"]))
+
+    def finish_turn(turn):
+        conversation.end_turn(turn["reply"])
+        turn_lock.release()
+
+    def reason(text):
+        """router/LLM stage: route the request locally or ask Gemini; turns with tool calls go on to the tools stage."""
+        nonlocal reply_cancelled
+        turn_lock.acquire()
+        # pass text to gemini, along with the recent conversation
+        contents = conversation.start_turn(text)
+        reply_cancelled = threading.Event()
+        turn = {"text": text, "reply": "", "intent": intent_router.route(text), "model_seconds": 0.0,
+                "cancelled": reply_cancelled}
+        try:
+            if turn["intent"]:
+                print(f"⚡ Routed locally to {turn['intent']}")
+                turn["function_calls"] = [types.FunctionCall(name=turn["intent"], args={})]
+            else:
+                # Send request with function declarations; any text is output as it streams in
+                request_started_at = time.perf_counter()
+                turn["function_calls"], turn["reply"] = generate_response(
+                    client, contents, context_cache.config(), output=functools.partial(emit_sentence, turn),
+                    conversation=conversation)
+                turn["model_seconds"] += time.perf_counter() - request_started_at
+        except Exception:
+            finish_turn(turn)
+            raise
+        if not turn["function_calls"]:
+            finish_turn(turn)
+            return None
+        return turn
+
+    def use_tools(turn):
+        """tools stage: run the requested tools and answer, until the model stops calling tools."""
+        function_calls = turn["function_calls"]
+        try:
+            for _ in range(MAX_TOOL_ROUNDS):
+                if not function_calls:
+                    break
+                results = tool_runner.run_all(function_calls)
+                conversation.add(types.Content(role="model", parts=[
+                    types.Part(function_call=call) for call in function_calls]))
+                conversation.add(types.Content(role="function", parts=[
+                    function_response_content(call.name, result).parts[0]
+                    for call, result in zip(function_calls, results)]))
+
+                # Results that are already speakable are output without asking the model again;
+                # the braille_mode_on confirmation is only printed, not output
+                if all(tool_renderer.policy(call.name) != REPHRASE for call in function_calls):
+                    replies = tool_renderer.render_all(
+                        [(call.name, result) for call, result in zip(function_calls, results)])
+                    if replies is not None:
+                        turn["reply"] = " ".join(r for _, r in replies)
+                        print(f"Assistant: {turn['reply']}")
+                        for name, r in replies:
+                            if name != "braille_mode_on":
+                                for sentence in split_sentences(r):
+                                    emit_sentence(turn, sentence)
+                        break
+
+                # Send the function results back to the model for a final response (or more calls)
+                only_braille_on = all(call.name == "braille_mode_on" for call in function_calls)
+                request_started_at = time.perf_counter()
+                function_calls, turn["reply"] = generate_response(
+                    client, conversation.contents(), context_cache.config(),
+                    output=None if only_braille_on else functools.partial(emit_sentence, turn),
+                    conversation=conversation)
+                rephrase_seconds = time.perf_counter() - request_started_at
+                tool_renderer.record_rephrase(rephrase_seconds)
+                turn["model_seconds"] += rephrase_seconds
+            else:
+                if function_calls:
+                    print(f"⚠️ Stopped after {MAX_TOOL_ROUNDS} rounds of tool calls")
+            if not turn["intent"]:
+                intent_router.record_model_tool_turn(turn["model_seconds"])
+        finally:
+            finish_turn(turn)
+
+    # mic -> stt -> router/LLM -> tools -> output, connected by bounded queues; sentences
+    # reach the output stage straight from the streaming model call via emit_sentence
+    engine = AssistantEngine([
+        Stage("mic", listen, source=True),
+        Stage("stt", transcribe),
+        Stage("reason", reason),
+        Stage("tools", use_tools),
+        Stage("output", output_sentence, queue_size=16),
+    ])
+
     print("Continuous speech recognition started.")
     print("Speak naturally - your speech will be transcribed in real-time.")
     print("Press Ctrl+C to stop.\n")
-    
-    while True:
-        try:
-            with microphone as source:
-                # Listen for audio with timeout
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=5)
-            
-            try:
-                # Convert speech to text
-                text = recognizer.recognize_google(audio)
-
-                if text.strip():  # Only print non-empty transcriptions
-                    print(f">> {text}")
-                    # pass text to gemini
-                    contents = [
-                        types.Content(role="user", parts=[types.Part(text=text)])
-                    ]
-
-                try:
-                    # Send request with function declarations
-                    response = client.models.generate_content(
-                        model="gemini-2.0-flash-exp",
-                        contents=contents,
-                        config=config,
-                    )
-                    
-                    # Check if the model wants to call a function
-                    if response.candidates[0].content.parts[0].function_call:
-                        function_call = response.candidates[0].content.parts[0].function_call
-                        function_name = function_call.name
-                        function_args = function_call.args or {}
-                        
-                        # Execute the function if it exists
-                        if function_name in AVAILABLE_FUNCTIONS:
-                            result = AVAILABLE_FUNCTIONS[function_name](**function_args)
-                            print(f"Function result: {result['message']}")
-                            
-                            # Send the function result back to the model for a final response
-                            function_result_content = types.Content(
-                                role="function",
-                                parts=[types.Part(
-                                    function_response=types.FunctionResponse(
-                                        name=function_name,
-                                        response=result
-                                    )
-                                )]
-                            )
-                            
-                            # Add the function result to the conversation and get final response
-                            contents.append(function_result_content)
-                            final_response = client.models.generate_content(
-                                model="gemini-2.0-flash-exp",
-                                contents=contents,
-                                config=config,
-                            )
-
-                            # print(result)
-                            print(f"Assistant: {final_response.candidates[0].content.parts[0].text}")
-                            if function_name == "braille_mode_on":
-                                braille_mode_on = True
-                                continue
-                            if function_name == "braille_mode_off":
-                                braille_mode_on = False
-                            
-
-                            if braille_mode_on:
-                                # parallel thread form brailles and speak with vapi
-                                form_brailles(final_response.candidates[0].content.parts[0].text)
-                            else:
-                                speak_with_vapi(final_response.candidates[0].content.parts[0].text)
-                        else:
-                            print(f"Function {function_name} not found!")
-                    else:
-                        # Direct text response from the model
-                        print(f"Assistant: {response.candidates[0].content.parts[0].text}")
-                        if braille_mode_on:
-                            form_brailles(response.candidates[0].content.parts[0].text)
-                        else:
-                            speak_with_vapi(response.candidates[0].content.parts[0].text)
-                    
-                except Exception as e:
-                    print(f"Error: {e}")
-                    
-            except sr.UnknownValueError:
-                # Ignore unclear audio - don't print anything
-                pass
-                
-        except sr.WaitTimeoutError:
-            # No speech detected - continue listening
-            pass
-        except KeyboardInterrupt:
-            print("\n\nStopping speech recognition...")
-            print("Goodbye!")
-            break
-        except sr.RequestError as e:
-            print(f"Error with speech recognition service: {e}")
-            print("Please check your internet connection and try again.")
-            break
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            break
+
+    try:
+        asyncio.run(engine.run())
+    except KeyboardInterrupt:
+        print("\n\nStopping speech recognition...")
+        capture.stop()
+        camera.stop()
+        # End the TTS call so no more audio arrives, cut off whatever is still playing
+        # and release the output stream and PyAudio
+        if vapi_tts:
+            vapi_tts.close()
+        if audio_sink:
+            audio_sink.flush()
+            audio_sink.close()
+        save_calibration(calibration_key, capture.energy_threshold)
+        print(f"🧩 Pipeline stage stats: {engine.stats()}")
+        print(f"🎙️ Capture stats: {capture.stats()}")
+        print(f"🗣️ Recognizer backend stats: {speech_to_text.stats()}")
+        print(f"💬 Conversation stats: {conversation.stats()}")
+        print(f"⚡ Intent router stats: {intent_router.stats()}")
+        print(f"🧾 Tool rendering stats: {tool_renderer.stats()}")
+        print(f"🛠️ Tool runner stats: {tool_runner.stats()}")
+        print(f"📷 Camera stats: {camera.stats()}")
+        print(f"🖼️ Frame preparation stats: {frame_preparer.stats()}")
+        print(f"🧠 Scene cache stats: {scene_cache.stats()}")
+        print(f"👤 Face directory stats: {face_directory.stats()}")
+        print(f"🌐 API endpoint stats: {endpoint_stats()}")
+        if audio_sink:
+            print(f"🔈 Audio output stats: {audio_sink.stats()}")
+        print(f"💾 TTS cache stats: {speech_cache.stats()}")
+        print("Goodbye!")
 
 
 def main():
@@ -253,7 +501,7 @@ def main():
 
 
 
-    continuous_speech_to_text(device_index)
+    continuous_speech_to_text(device_index, device_info['name'])
    
 if __name__ == "__main__":
     main()
\ No newline at end of file
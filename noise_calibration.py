@@ -0,0 +1,71 @@
+import collections
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CALIBRATION_FILE = os.getenv("NOISE_CALIBRATION_FILE", ".noise_calibration.json")
+NOISE_WINDOW_SECONDS = 5     # recent audio the noise floor is estimated from
+NOISE_PERCENTILE = 20        # speech has pauses, so the quietest fifth of the window is background noise
+THRESHOLD_RATIO = 2.0        # speech must be this much louder than the noise floor
+MIN_ENERGY_THRESHOLD = 100
+ADJUSTMENT_DAMPING = 0.15    # like Recognizer.dynamic_energy_adjustment_damping, per second
+
+
+def load_calibration(device_name, path=CALIBRATION_FILE):
+    """Saved energy threshold for a microphone, or None if it was never calibrated."""
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(device_name)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return entry["energy_threshold"] if entry else None
+
+
+def save_calibration(device_name, energy_threshold, path=CALIBRATION_FILE):
+    try:
+        with open(path) as f:
+            calibrations = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        calibrations = {}
+    calibrations[device_name] = {"energy_threshold": energy_threshold, "updated_at": time.time()}
+    with open(path, "w") as f:
+        json.dump(calibrations, f, indent=2)
+
+
+class EnergyThresholdTracker:
+    """Keeps the VAD energy threshold a fixed ratio above the current noise floor.
+
+    update() is called with the energy of every captured chunk. The noise floor
+    is a low percentile of the last NOISE_WINDOW_SECONDS, so it follows the room
+    (quiet office, street) but not the user's speech; the threshold moves toward
+    floor * THRESHOLD_RATIO with exponential damping.
+    """
+
+    def __init__(self, energy_threshold, chunk_seconds, window_seconds=NOISE_WINDOW_SECONDS):
+        self.threshold = float(energy_threshold)
+        self.chunk_seconds = chunk_seconds
+        self.min_seen = self.max_seen = self.threshold
+        self._energies = collections.deque(maxlen=max(1, int(window_seconds / chunk_seconds)))
+        self._damping = ADJUSTMENT_DAMPING ** chunk_seconds
+        self._lock = threading.Lock()
+
+    def update(self, energy):
+        with self._lock:
+            self._energies.append(energy)
+            if len(self._energies) < self._energies.maxlen:
+                return self.threshold  # wait for a full window before trusting the floor
+            floor = float(np.percentile(self._energies, NOISE_PERCENTILE))
+            target = max(MIN_ENERGY_THRESHOLD, floor * THRESHOLD_RATIO)
+            self.threshold = self.threshold * self._damping + target * (1 - self._damping)
+            self.min_seen = min(self.min_seen, self.threshold)
+            self.max_seen = max(self.max_seen, self.threshold)
+            return self.threshold
+
+    def stats(self):
+        return {"energy_threshold": self.threshold, "min": self.min_seen, "max": self.max_seen}
@@ -0,0 +1,112 @@
+import collections
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+from latency_stats import mean, recent_samples
+
+load_dotenv()
+
+SCENE_CACHE_TTL = float(os.getenv("SCENE_CACHE_TTL", "60"))   # seconds a cached answer stays valid
+SCENE_CACHE_SIZE = 32
+SCENE_THUMBNAIL_WIDTH = 32   # cells across; each averages ~24x24 pixels of a 768 px upload, so sensor noise cancels
+# Images whose thumbnails differ by at most this many levels in every cell and channel show the same scene.
+# Noise, exposure drift and a couple of pixels of shake stay under ~12; an object added, moved or
+# recoloured, a person stepping in, or a different page of text at the same spot is 40 or more.
+SCENE_MAX_DIFFERENCE = int(os.getenv("SCENE_MAX_DIFFERENCE", "20"))
+
+
+def thumbnail(image, width=SCENE_THUMBNAIL_WIDTH):
+    """Colour thumbnail with each channel's mean subtracted, so auto-exposure changes don't count."""
+    height = max(1, round(width * image.shape[0] / image.shape[1]))
+    small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return small - small.reshape(-1, small.shape[-1]).mean(axis=0).astype(np.int16)
+
+
+def difference(a, b):
+    """Largest per-cell difference between two thumbnails; thumbnails of different shapes never match."""
+    if a.shape != b.shape:
+        return float("inf")
+    return int(np.abs(a - b).max())
+
+
+class SceneCache:
+    """Vision tool results keyed by tool name and a thumbnail of the uploaded image.
+
+    get() finds a result stored for the same tool whose thumbnail is within
+    max_difference of this image's in every cell, so asking again about an
+    unchanged scene is answered without another upload. Pass the image that
+    is actually uploaded (the sharpest frame, downscaled), not an arbitrary
+    frame of the burst. A per-cell maximum rather than a global hash is what
+    tells a small object added to the scene from sensor noise. Entries expire after ttl seconds
+    and the least recently used one is evicted beyond max_entries. put() is
+    given how long the real call took, which every later hit saves.
+    """
+
+    def __init__(self, ttl=SCENE_CACHE_TTL, max_entries=SCENE_CACHE_SIZE, max_difference=SCENE_MAX_DIFFERENCE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_difference = max_difference
+        self.entries = collections.OrderedDict()  # (tool, thumbnail bytes) -> (thumbnail, result, stored_at, seconds)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.seconds_saved = 0.0
+        self.thumbnail_seconds = recent_samples()
+        self._lock = threading.Lock()
+
+    def get(self, tool, image):
+        """(thumbnail, cached result or None) for this tool and image."""
+        started_at = time.perf_counter()
+        image_thumbnail = thumbnail(image)
+        self.thumbnail_seconds.append(time.perf_counter() - started_at)
+        now = time.monotonic()
+        with self._lock:
+            best, best_difference = None, self.max_difference + 1
+            for key, (entry_thumbnail, result, stored_at, seconds) in list(self.entries.items()):
+                if now - stored_at > self.ttl:
+                    del self.entries[key]
+                    self.expired += 1
+                    continue
+                if key[0] != tool:
+                    continue
+                distance = difference(entry_thumbnail, image_thumbnail)
+                if distance < best_difference:
+                    best, best_difference = key, distance
+            if best is None:
+                self.misses += 1
+                return image_thumbnail, None
+            self.entries.move_to_end(best)
+            _, result, stored_at, seconds = self.entries[best]
+            self.hits += 1
+            self.seconds_saved += seconds
+        print(f"🧠 {tool}: same scene as {now - stored_at:.0f}s ago (differs by at most {best_difference}), "
+              f"reusing the answer")
+        return image_thumbnail, result
+
+    def put(self, tool, image_thumbnail, result, seconds):
+        key = (tool, image_thumbnail.tobytes())
+        with self._lock:
+            self.entries[key] = (image_thumbnail, result, time.monotonic(), seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "seconds_saved": self.seconds_saved,
+            "mean_thumbnail_ms": mean(self.thumbnail_seconds) * 1000,
+        }
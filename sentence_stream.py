@@ -0,0 +1,52 @@
+import re
+
+# A sentence ends at . ! or ? (plus closing quotes/brackets) followed by whitespace,
+# or at a blank line. Requiring the whitespace means "3." waits for the next chunk
+# in case it turns out to be "3.5".
+SENTENCE_END_RE = re.compile(r"([.!?]+[\"')\]]*)(?=\s)|\n\s*\n")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx"}
+
+
+def _ends_with_abbreviation(text):
+    """True if the '.' ending text belongs to an abbreviation or an initial, not a sentence end."""
+    if not text.endswith("."):
+        return False
+    last_word = text.rstrip(".").rsplit(None, 1)[-1].lower() if text.rstrip(".") else ""
+    return last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha())
+
+
+class SentenceSplitter:
+    """Turns a stream of text chunks into complete sentences.
+
+    feed() returns the sentences completed by the new chunk and keeps the unfinished
+    tail; flush() returns whatever is left once the stream ends.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_RE.finditer(self._buffer):
+            end = match.end(1) if match.group(1) else match.start()
+            sentence = self._buffer[start:end].strip()
+            if match.group(1) and _ends_with_abbreviation(sentence):
+                continue
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str) -> list:
+    """Split a complete text into sentences."""
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
@@ -0,0 +1,227 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+import wave
+
+import speech_recognition as sr
+from dotenv import load_dotenv
+
+from latency_stats import percentile, recent_samples
+
+try:
+    import vosk
+except ImportError:  # the offline backend is optional
+    vosk = None
+
+load_dotenv()
+
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH")
+LATENCY_BUDGET_SECONDS = 3.0   # slower than this and the next backend is tried
+FAILOVER_COOLDOWN_SECONDS = 30  # a failed backend is skipped for this long
+# A Google call abandoned at the budget still holds a pool thread until its socket gives up
+GOOGLE_OPERATION_TIMEOUT_SECONDS = LATENCY_BUDGET_SECONDS + 1.0
+VOSK_SAMPLE_RATE = 16000
+
+
+def word_error_rate(reference: str, hypothesis: str):
+    """(word edits, reference word count) between two transcripts."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+class RecognizerBackend:
+    """One speech-to-text engine; recognize() raises sr.UnknownValueError / sr.RequestError like the sr API."""
+
+    name = "backend"
+
+    def __init__(self):
+        self.latencies = recent_samples()  # seconds per recent successful call
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.unclear = 0
+        self.word_errors = 0
+        self.reference_words = 0
+        self.down_until = 0.0
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        raise NotImplementedError
+
+    def timed_recognize(self, audio):
+        started_at = time.perf_counter()
+        try:
+            text = self.recognize(audio)
+        except sr.UnknownValueError:
+            self.unclear += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        self.latencies.append(time.perf_counter() - started_at)
+        self.successes += 1
+        return text
+
+    def score(self, reference, hypothesis):
+        """Add one transcript to the word error rate."""
+        errors, words = word_error_rate(reference, hypothesis)
+        self.word_errors += errors
+        self.reference_words += words
+
+    @property
+    def available(self):
+        return time.time() >= self.down_until
+
+    def stats(self):
+        return {
+            "calls": self.successes + self.failures + self.unclear,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "unclear": self.unclear,
+            "p50_ms": percentile(self.latencies, 0.5) * 1000,
+            "p95_ms": percentile(self.latencies, 0.95) * 1000,
+            "wer": self.word_errors / self.reference_words if self.reference_words else None,
+        }
+
+
+class GoogleBackend(RecognizerBackend):
+    """The Google Web Speech API through speech_recognition (needs the network)."""
+
+    name = "google"
+
+    def __init__(self, recognizer=None, operation_timeout=GOOGLE_OPERATION_TIMEOUT_SECONDS):
+        super().__init__()
+        self.recognizer = recognizer or sr.Recognizer()
+        # The default of None lets a stalled request run (and hold its thread) forever
+        self.recognizer.operation_timeout = operation_timeout
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline recognition with a Vosk model, loaded once and shared by every call."""
+
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        super().__init__()
+        if vosk is None:
+            raise RuntimeError("vosk is not installed (pip install vosk)")
+        if not model_path or not os.path.isdir(model_path):
+            raise RuntimeError(f"Vosk model not found at {model_path!r} (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+
+    def recognize(self, audio):
+        recognizer = vosk.KaldiRecognizer(self.model, VOSK_SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def load_wav_utterances(directory):
+    """(name, sr.AudioData, reference transcript) for every name.wav with a name.txt next to it."""
+    utterances = []
+    for filename in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(filename)
+        transcript_path = os.path.join(directory, f"{name}.txt")
+        if ext.lower() != ".wav" or not os.path.exists(transcript_path):
+            continue
+        with wave.open(os.path.join(directory, filename), "rb") as f:
+            audio = sr.AudioData(f.readframes(f.getnframes()), f.getframerate(), f.getsampwidth())
+        with open(transcript_path) as f:
+            utterances.append((name, audio, f.read().strip()))
+    return utterances
+
+
+class ReplayBackend(RecognizerBackend):
+    """Deterministic backend for benchmarks: returns the recorded transcript of known WAV audio.
+
+    Audio is matched by a hash of its PCM, so utterances loaded with
+    load_wav_utterances() are "recognized" exactly, after a fixed latency.
+    """
+
+    name = "replay"
+
+    def __init__(self, utterances, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.transcripts = {self._key(audio): text for _, audio, text in utterances}
+
+    @staticmethod
+    def _key(audio):
+        return hashlib.sha1(audio.frame_data).hexdigest()
+
+    def recognize(self, audio):
+        time.sleep(self.latency)
+        text = self.transcripts.get(self._key(audio))
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class FailoverRecognizer:
+    """Tries backends in order, skipping past errors and latency spikes.
+
+    A backend that raises sr.RequestError (or anything else except
+    sr.UnknownValueError) or takes longer than latency_budget is taken out
+    of rotation for cooldown seconds and the next one is tried; the last
+    available backend is always waited for. A late result is discarded.
+    """
+
+    def __init__(self, backends, latency_budget=LATENCY_BUDGET_SECONDS, cooldown=FAILOVER_COOLDOWN_SECONDS):
+        self.backends = backends
+        self.latency_budget = latency_budget
+        self.cooldown = cooldown
+        self.failovers = 0
+        self.last_backend = None
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=4 * len(backends),
+                                                           thread_name_prefix="asr")
+
+    def recognize(self, audio):
+        candidates = [b for b in self.backends if b.available] or self.backends
+        for i, backend in enumerate(candidates):
+            last = i == len(candidates) - 1
+            future = self._pool.submit(backend.timed_recognize, audio)
+            try:
+                text = future.result(timeout=None if last else self.latency_budget)
+                self.last_backend = backend
+                return text
+            except sr.UnknownValueError:
+                raise  # The audio was unclear, another engine won't do better
+            except concurrent.futures.TimeoutError:
+                backend.timeouts += 1
+                print(f"⏱️ {backend.name} recognition took over {self.latency_budget:.1f}s, failing over")
+            except Exception as e:
+                print(f"⚠️ {backend.name} recognition failed: {e}")
+            if last:
+                break
+            backend.down_until = time.time() + self.cooldown
+            self.failovers += 1
+        raise sr.RequestError("every recognition backend failed")
+
+    def stats(self):
+        return {"failovers": self.failovers, **{b.name: b.stats() for b in self.backends}}
+
+
+def configured_backends(recognizer=None):
+    """Google first, then the offline Vosk engine if VOSK_MODEL_PATH points at a model."""
+    backends = [GoogleBackend(recognizer)]
+    if VOSK_MODEL_PATH:
+        try:
+            backends.append(VoskBackend(VOSK_MODEL_PATH))
+            print(f"🗣️ Offline recognition ready ({VOSK_MODEL_PATH})")
+        except Exception as e:
+            print(f"⚠️ Offline recognition unavailable: {e}")
+    return backends
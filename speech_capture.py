@@ -0,0 +1,194 @@
+import collections
+import queue
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from noise_calibration import EnergyThresholdTracker
+
+RING_SECONDS = 10            # raw microphone audio the segmenter may fall behind by
+PRE_ROLL_MS = 300            # audio kept from before the VAD fired, so first syllables aren't clipped
+END_SILENCE_MS = 800         # this much silence ends an utterance (Recognizer.pause_threshold)
+MIN_SPEECH_MS = 250          # shorter bursts of energy are clicks and bumps, not speech
+MAX_PHRASE_SECONDS = 30      # longer utterances are cut here and continue in a new segment
+MAX_QUEUED_SEGMENTS = 8
+
+
+def chunk_energy(chunk: bytes, sample_width=2):
+    """RMS energy of a chunk of signed PCM, on the same scale as Recognizer.energy_threshold."""
+    samples = np.frombuffer(chunk, dtype=np.int16 if sample_width == 2 else np.int32)
+    if not len(samples):
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+class AudioRingBuffer:
+    """Fixed-capacity FIFO of audio chunks that overwrites the oldest chunk when full.
+
+    The writer (the capture thread) never blocks; every chunk overwritten before
+    it was read is counted in dropped_chunks.
+    """
+
+    def __init__(self, capacity_chunks):
+        self.capacity = capacity_chunks
+        self.dropped_chunks = 0
+        self.max_depth = 0
+        self._chunks = collections.deque()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def write(self, chunk):
+        with self._condition:
+            if len(self._chunks) >= self.capacity:
+                self._chunks.popleft()
+                self.dropped_chunks += 1
+            self._chunks.append(chunk)
+            self.max_depth = max(self.max_depth, len(self._chunks))
+            self._condition.notify()
+
+    def read(self, timeout=None):
+        """Oldest unread chunk, or None if nothing arrived within timeout."""
+        with self._condition:
+            if not self._chunks and not self._condition.wait(timeout):
+                return None
+            return self._chunks.popleft() if self._chunks else None
+
+
+class SpeechCapture:
+    """Reads the microphone continuously and cuts it into utterances.
+
+    A capture thread only copies microphone chunks into an AudioRingBuffer; a
+    segmenter thread runs an energy VAD over them and puts every utterance, as
+    sr.AudioData, on the `segments` queue. Capture therefore continues while
+    earlier utterances are being recognized or answered. While pause_event is
+    set (e.g. the assistant is speaking) incoming audio is discarded. With
+    adaptive=True an EnergyThresholdTracker keeps energy_threshold above the
+    current background noise.
+    """
+
+    def __init__(self, microphone, energy_threshold=300, pause_event=None,
+                 max_queued_segments=MAX_QUEUED_SEGMENTS, adaptive=True):
+        self.microphone = microphone
+        self.energy_threshold = energy_threshold
+        self.adaptive = adaptive
+        self.tracker = None
+        self.pause_event = pause_event or threading.Event()
+        self.segments = queue.Queue(maxsize=max_queued_segments)
+        self.sample_rate = None
+        self.sample_width = None
+        self.chunk_ms = None
+        self.ring = None
+
+        self.segment_count = 0
+        self.discarded_segments = 0  # energy bursts too short to be speech
+        self.dropped_segments = 0
+        self.dropped_segment_ms = 0.0
+        self.paused_ms = 0.0
+        self.max_queue_depth = 0
+        self._running = threading.Event()
+        self._ready = threading.Event()
+        self._threads = []
+
+    def start(self, timeout=5):
+        """Open the microphone and start capturing; False if it didn't open within timeout."""
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._capture, daemon=True),
+            threading.Thread(target=self._segment, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def stats(self):
+        ring_depth = len(self.ring) if self.ring is not None else 0
+        dropped_ring_ms = self.ring.dropped_chunks * self.chunk_ms if self.ring is not None else 0.0
+        return {
+            "segments": self.segment_count,
+            "discarded_segments": self.discarded_segments,
+            "energy_threshold": self.energy_threshold,
+            "queue_depth": self.segments.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "ring_depth_ms": ring_depth * (self.chunk_ms or 0),
+            "max_ring_depth_ms": self.ring.max_depth * self.chunk_ms if self.ring is not None else 0.0,
+            "dropped_segments": self.dropped_segments,
+            "dropped_audio_ms": dropped_ring_ms + self.dropped_segment_ms,
+            "paused_ms": self.paused_ms,
+        }
+
+    def _capture(self):
+        try:
+            with self.microphone as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                self.chunk_ms = source.CHUNK * 1000 / source.SAMPLE_RATE
+                self.ring = AudioRingBuffer(int(RING_SECONDS * 1000 / self.chunk_ms))
+                self._ready.set()
+                while self._running.is_set():
+                    self.ring.write(source.stream.read(source.CHUNK))
+        except Exception as e:
+            print(f"❌ Microphone capture stopped: {e}")
+        self._running.clear()
+
+    def _segment(self):
+        if not self._ready.wait(timeout=5):
+            return
+        pre_roll = collections.deque(maxlen=max(1, int(PRE_ROLL_MS / self.chunk_ms)))
+        end_silence_chunks = max(1, int(END_SILENCE_MS / self.chunk_ms))
+        max_phrase_chunks = int(MAX_PHRASE_SECONDS * 1000 / self.chunk_ms)
+        if self.adaptive:
+            self.tracker = EnergyThresholdTracker(self.energy_threshold, self.chunk_ms / 1000)
+        phrase = None
+        silent_chunks = voiced_chunks = 0
+
+        while self._running.is_set():
+            chunk = self.ring.read(timeout=0.1)
+            if chunk is None:
+                continue
+            if self.pause_event.is_set():
+                self.paused_ms += self.chunk_ms
+                phrase = None
+                pre_roll.clear()
+                continue
+
+            energy = chunk_energy(chunk, self.sample_width)
+            voiced = energy > self.energy_threshold
+            if self.tracker:
+                self.energy_threshold = self.tracker.update(energy)
+            if phrase is None:
+                pre_roll.append(chunk)
+                if voiced:
+                    phrase = list(pre_roll)
+                    pre_roll.clear()
+                    silent_chunks, voiced_chunks = 0, 1
+                continue
+
+            phrase.append(chunk)
+            voiced_chunks += voiced
+            silent_chunks = 0 if voiced else silent_chunks + 1
+            if silent_chunks >= end_silence_chunks or len(phrase) >= max_phrase_chunks:
+                if voiced_chunks * self.chunk_ms >= MIN_SPEECH_MS:
+                    self._emit(phrase)
+                else:
+                    self.discarded_segments += 1
+                phrase = None
+
+    def _emit(self, chunks):
+        audio = sr.AudioData(b"".join(chunks), self.sample_rate, self.sample_width)
+        try:
+            self.segments.put_nowait(audio)
+            self.segment_count += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.segments.qsize())
+        except queue.Full:
+            self.dropped_segments += 1
+            self.dropped_segment_ms += len(chunks) * self.chunk_ms
+            print("⚠️ Recognition is falling behind, dropping an utterance")
+
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+import requests
+
+import api_clients
+from api_benchmark import ApiStandIn
+from api_clients import ENDPOINTS, ApiEndpoint, CircuitOpenError
+
+COOLDOWN = 0.2
+
+
+@pytest.fixture
+def standin():
+    server = ApiStandIn(connect_delay=0, latency=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def endpoint(standin, monkeypatch):
+    """Endpoint factory against the stand-in, with retries that don't wait."""
+    monkeypatch.setattr(api_clients, "backoff_seconds", lambda attempt: 0)
+    created = []
+
+    def make(**kwargs):
+        kwargs.setdefault("retries", 0)
+        kwargs.setdefault("failure_threshold", 2)
+        kwargs.setdefault("cooldown", COOLDOWN)
+        created.append(ApiEndpoint(f"test-{len(created)}", standin.url, **kwargs))
+        return created[-1]
+
+    yield make
+    for api in created:
+        ENDPOINTS.pop(api.name, None)
+
+
+def test_breaker_opens_after_threshold_and_rejects(standin, endpoint):
+    api = endpoint()
+    standin.down = True
+    for _ in range(2):
+        assert api.request("GET", "/").status_code == 503
+    assert api.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        api.request("GET", "/")
+    assert standin.requests == 2
+    assert api.stats()["rejected"] == 1
+
+
+def test_circuit_open_error_is_a_connection_error(standin, endpoint):
+    api = endpoint(failure_threshold=1)
+    standin.down = True
+    api.request("GET", "/")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.request("GET", "/")
+
+
+def test_breaker_half_open_trial_success_closes(standin, endpoint):
+    api = endpoint()
+    standin.down = True
+    for _ in range(2):
+        api.request("GET", "/")
+    standin.down = False
+    time.sleep(COOLDOWN)
+
+    states = []
+
+    def trial():
+        states.append(api.breaker.state)
+        return api.session.get(standin.url)
+
+    assert api.call(trial).status_code == 200
+    assert states == ["half-open"]
+    assert api.breaker.state == "closed"
+    assert api.request("GET", "/").status_code == 200
+
+
+def test_breaker_half_open_trial_failure_reopens(standin, endpoint):
+    api = endpoint()
+    standin.down = True
+    for _ in range(2):
+        api.request("GET", "/")
+    time.sleep(COOLDOWN)
+
+    assert api.request("GET", "/").status_code == 503
+    assert api.breaker.state == "open"
+    assert api.breaker.opened == 2
+    with pytest.raises(CircuitOpenError):
+        api.request("GET", "/")
+
+
+def test_retry_statuses_are_retried(standin, endpoint):
+    api = endpoint(retries=2)
+    standin.down = True
+
+    def recovering():
+        response = api.session.get(standin.url)
+        standin.down = False
+        return response
+
+    assert api.call(recovering).status_code == 200
+    assert api.retried == 1
+    assert standin.requests == 2
+
+
+def test_other_statuses_are_not_retried(standin, endpoint):
+    api = endpoint(retries=2, retry_statuses=(429,))
+    standin.down = True
+    assert api.request("GET", "/").status_code == 503
+    assert api.retried == 0
+    assert standin.requests == 1
+
+
+def test_busy_statuses_do_not_trip_the_breaker(standin, endpoint):
+    api = endpoint(retry_statuses=(), busy_statuses=(503,))
+    standin.down = True
+    for _ in range(5):
+        assert api.request("GET", "/").status_code == 503
+    assert api.breaker.state == "closed"
+    assert api.stats()["failures"] == 0
+    assert api.stats()["circuit_opened"] == 0
@@ -2,35 +2,68 @@ import os
 import cohere
 import base64
 from dotenv import load_dotenv
-import cv2
 import base64
-import requests
+import httpx
+import time
+
+from api_clients import ApiEndpoint
+from camera_service import CameraService
+from face_directory import FaceDirectory
+from frame_preparation import FramePreparer
+from scene_cache import SceneCache
 
 # Load environment variables
 load_dotenv()
 
-def read_text() -> dict[str, str]:
-    model = "c4ai-aya-vision-8b"
-    co = cohere.ClientV2(os.getenv("COHERE_API_KEY"))
-
-    # open camera
-    cap = cv2.VideoCapture(1) # 0 built-in webcam, 1 is virtual cam
-    if not cap.isOpened():
-        return {"message": "❌ Could not access the camera."}
-
-    ret, frame = cap.read()
-    cap.release()
+VISION_MODEL = "c4ai-aya-vision-8b"
+COHERE_BASE_URL = "https://api.cohere.com"
+
+# API clients are created once and keep their connections alive between tool calls
+cohere_http = httpx.Client(timeout=httpx.Timeout(30, connect=3))
+co = cohere.ClientV2(os.getenv("COHERE_API_KEY"), httpx_client=cohere_http)
+# The Cohere SDK retries on its own; the endpoint adds the circuit breaker and latency stats
+cohere_api = ApiEndpoint("cohere", COHERE_BASE_URL, retries=0, warm=lambda: cohere_http.head(COHERE_BASE_URL))
+facepp = ApiEndpoint("facepp", "https://api-us.faceplusplus.com", timeout=(3, 10))
+supabase = ApiEndpoint("supabase", os.getenv("SUPABASE_URL"), timeout=(3, 5), headers={
+    "apikey": os.getenv("SUPABASE_API_KEY"),
+    "Authorization": f"Bearer {os.getenv('SUPABASE_API_KEY')}",
+    "Content-Type": "application/json"
+})
+
+# One always-open camera shared by all tools (CAMERA_DEVICE_INDEX, CAMERA_SOURCE=synthetic for tests)
+camera = CameraService()
+
+BURST_SECONDS = 0.5  # recent frames the sharpest one is picked from
+
+def capture_burst():
+    """The last BURST_SECONDS of camera frames. Returns (frames, None) or (None, error message)."""
+    latest = camera.latest_frame()
+    if latest is None:
+        return None, "❌ Could not access the camera."
+
+    return [image for _, image in camera.frames_since(latest[0] - BURST_SECONDS)], None
+
+# Picks the sharpest frame and sizes it for each tool's vision API
+frame_preparer = FramePreparer()
+# Answers for a scene that hasn't changed since it was last read or described
+scene_cache = SceneCache()
+# facedb (face_id -> name), preloaded by main with face_directory.start()
+face_directory = FaceDirectory(supabase)
 
-    if not ret:
-        return {"message": "❌ Failed to capture image from camera."}
+def read_text() -> dict[str, str]:
+    # The newest frames from the always-open camera
+    frames, error = capture_burst()
+    if error:
+        return {"message": error}
+    # Not cached: two pages at the same spot look alike to any cheap image comparison
+    buffer, _ = frame_preparer.prepare("read_text", frames)
 
-    # Encode captured frame as JPEG
-    _, buffer = cv2.imencode(".jpg", frame)
     base64_image_url = f"data:image/jpeg;base64,{base64.b64encode(buffer).decode('utf-8')}"
 
     # Send to Cohere vision model - Fixed the image_url structure
-    response = co.chat(
-        model=model,
+    response = cohere_api.call(
+        co.chat,
+        model=VISION_MODEL,
         messages=[
             {
                 "role": "user",
@@ -46,27 +79,23 @@ def read_text() -> dict[str, str]:
     return {"message": response.message.content[0].text}
 
 def describe_image() -> dict[str, str]:
-    model = "c4ai-aya-vision-8b"
-    co = cohere.ClientV2(os.getenv("COHERE_API_KEY"))
-
-    # open camera
-    cap = cv2.VideoCapture(1) # 0 built-in webcam, 1 is virtual cam
-    if not cap.isOpened():
-        return {"message": "❌ Could not access the camera."}
-
-    ret, frame = cap.read()
-    cap.release()
-
-    if not ret:
-        return {"message": "❌ Failed to capture image from camera."}
+    # The newest frames from the always-open camera
+    frames, error = capture_burst()
+    if error:
+        return {"message": error}
+    buffer, image = frame_preparer.prepare("describe_infront_of_me", frames)
+    # Asking again about an unchanged scene is answered from the cache, compared on the image that would be uploaded
+    image_thumbnail, cached = scene_cache.get("describe_infront_of_me", image)
+    if cached:
+        return cached
+    started_at = time.perf_counter()
 
-    # Encode captured frame as JPEG
-    _, buffer = cv2.imencode(".jpg", frame)
     base64_image_url = f"data:image/jpeg;base64,{base64.b64encode(buffer).decode('utf-8')}"
 
     # Send to Cohere vision model - Fixed the image_url structure
-    response = co.chat(
-        model=model,
+    response = cohere_api.call(
+        co.chat,
+        model=VISION_MODEL,
         messages=[
             {
                 "role": "user",
@@ -79,27 +108,24 @@ def describe_image() -> dict[str, str]:
         temperature=0.3,
     )
 
-    return {"message": response.message.content[0].text}
+    result = {"message": response.message.content[0].text}
+    scene_cache.put("describe_infront_of_me", image_thumbnail, result, time.perf_counter() - started_at)
+    return result
 
 # recognize face
 def recognize_face() -> dict[str, str]:
-    # Open camera
-    cap = cv2.VideoCapture(1)  # 0 for default webcam, 1 for external
-    if not cap.isOpened():
-        return {"message": "❌ Could not access the camera."}
-
-    ret, frame = cap.read()
-    cap.release()
+    # The newest frames from the always-open camera
+    frames, error = capture_burst()
+    if error:
+        return {"message": error}
+    # Only the face is uploaded; with nobody in view there is nothing to search for
+    buffer, _ = frame_preparer.prepare("recognize_face", frames)
+    if buffer is None:
+        return {"message": "⚠️ No face in view."}
 
-    if not ret:
-        return {"message": "❌ Failed to capture image from camera."}
-
-    # Encode captured frame as JPEG
-    _, buffer = cv2.imencode(".jpg", frame)
     image_base64 = base64.b64encode(buffer).decode("utf-8")
 
     # Send to Face++ search API
-    url = "https://api-us.faceplusplus.com/facepp/v3/search"
     payload = {
         "api_key": os.getenv("FACEPP_API_KEY"),
         "api_secret": os.getenv("FACEPP_API_SECRET"),
@@ -108,7 +134,7 @@ def recognize_face() -> dict[str, str]:
     }
 
     try:
-        response = requests.post(url, data=payload)
+        response = facepp.request("POST", "/facepp/v3/search", data=payload)
         result = response.json()
 
         if "error_message" in result:
@@ -121,29 +147,11 @@ def recognize_face() -> dict[str, str]:
         face_token = top_match["face_token"]
         confidence = top_match["confidence"]
 
-        # fetch the name from the supabase database table called facedb structured as [face_id] -> [name]
-        supabase_url = os.getenv('SUPABASE_URL')  # This already contains https://
-        url = f"{supabase_url}/rest/v1/facedb?face_id=eq.{face_token}"
-        headers = {
-            "apikey": os.getenv("SUPABASE_API_KEY"),
-            "Authorization": f"Bearer {os.getenv('SUPABASE_API_KEY')}",
-            "Content-Type": "application/json"
-        }
-
-        print(f"🔍 Querying Supabase: {url}")
-        response = requests.get(url, headers=headers)
-        print(f"📡 Response status: {response.status_code}")
-        print(f"📄 Response body: {response.text}")
-
-        if response.status_code != 200:
-            return {"message": f"❌ Supabase query failed with status {response.status_code}: {response.text}"}
-
-        data = response.json()
-        if not data or len(data) == 0:
+        # look the name up in the facedb table ([face_id] -> [name]), held in memory
+        name = face_directory.lookup(face_token)
+        if name is None:
             return {"message": f"❌ No person found with face token: {face_token}"}
 
-        name = data[0]["name"]
-
         return {
             "name": name,
             "confidence": confidence,
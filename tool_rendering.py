@@ -0,0 +1,126 @@
+import os
+import re
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from latency_stats import mean, recent_samples
+
+load_dotenv()
+
+# How a tool's result becomes the reply:
+TEMPLATE = "template"        # filled in locally from the result's fields
+PASSTHROUGH = "passthrough"  # the result message is already speakable
+REPHRASE = "rephrase"        # sent back to the model for a final response (second round trip)
+
+DEFAULT_POLICIES = {
+    "recognize_face": TEMPLATE,
+    "braille_mode_on": PASSTHROUGH,
+    "braille_mode_off": PASSTHROUGH,
+    "read_text": PASSTHROUGH,
+    "describe_infront_of_me": REPHRASE,
+}
+FACE_CONFIDENT = 80          # Face++ confidence (0-100) above which the name is stated plainly
+ERROR_REPLY = "Sorry, something went wrong. Please try again."
+STATUS_PREFIX_RE = re.compile(r"^[^\w\"']+")
+
+
+def configured_policies():
+    """DEFAULT_POLICIES overridden by TOOL_RENDERING, e.g. "read_text=rephrase,recognize_face=passthrough"."""
+    policies = dict(DEFAULT_POLICIES)
+    for item in os.getenv("TOOL_RENDERING", "").split(","):
+        name, _, policy = item.strip().partition("=")
+        if policy in (TEMPLATE, PASSTHROUGH, REPHRASE):
+            policies[name] = policy
+        elif item.strip():
+            print(f"⚠️ Ignoring TOOL_RENDERING entry {item.strip()!r}")
+    return policies
+
+
+def render_face(result):
+    if "No face in view" in result.get("message", ""):
+        return "I don't see anyone in front of you."
+    if "name" not in result:
+        unknown = ("No matching face" in result.get("message", "")
+                   or "No person found" in result.get("message", ""))
+        return "I don't recognize this person." if unknown else None
+    if result.get("confidence", 0) >= FACE_CONFIDENT:
+        return f"This is {result['name']}."
+    return f"This might be {result['name']}, but I'm not sure."
+
+
+TEMPLATES = {
+    "recognize_face": render_face,
+}
+
+
+class ToolRenderer:
+    """Turns tool results into replies according to a per-tool policy.
+
+    render() returns the reply text, or None when the tool's policy is REPHRASE
+    and the caller has to ask the model. Tools without a policy are rephrased.
+    Failures (messages starting with ❌ that carry technical detail) become a
+    short apology instead of being read out. render_all() renders one round of
+    tool results and only counts them once it knows whether the round is
+    answered locally, so a round that still goes to the model isn't counted
+    as a skipped model call. record_rephrase() feeds the measured cost of a
+    model rephrase into the seconds-saved estimate.
+    """
+
+    def __init__(self, policies=None):
+        self.policies = configured_policies() if policies is None else policies
+        self.rendered = {TEMPLATE: 0, PASSTHROUGH: 0, REPHRASE: 0, "error": 0}
+        self.model_calls_skipped = 0
+        self.render_seconds = recent_samples()
+        self.rephrase_seconds = recent_samples()
+
+    def policy(self, function_name):
+        return self.policies.get(function_name, REPHRASE)
+
+    def render(self, function_name, result):
+        replies = self.render_all([(function_name, result)])
+        return replies[0][1] if replies else None
+
+    def render_all(self, named_results):
+        """[(function_name, reply)] for every (function_name, result), or None if any needs the model."""
+        started_at = time.perf_counter()
+        rendered = [(name, *self._render(name, result)) for name, result in named_results]
+        if any(reply is None for _, reply, _ in rendered):
+            self.rendered[REPHRASE] += len(rendered)
+            return None
+        for _, _, kind in rendered:
+            self.rendered[kind] += 1
+        self.model_calls_skipped += 1
+        self.render_seconds.append(time.perf_counter() - started_at)
+        return [(name, reply) for name, reply, _ in rendered]
+
+    def _render(self, function_name, result):
+        """(reply, kind) for one result; reply is None when the model has to rephrase it."""
+        policy = self.policy(function_name)
+        message = result.get("message", "")
+        template = TEMPLATES.get(function_name) if policy == TEMPLATE else None
+        reply = template(result) if template else None
+        if reply:
+            kind = TEMPLATE
+        elif message.startswith("❌") and ":" in message:
+            reply, kind = ERROR_REPLY, "error"
+        elif policy in (TEMPLATE, PASSTHROUGH):
+            reply, kind = STATUS_PREFIX_RE.sub("", message).strip(), PASSTHROUGH
+        if not reply:
+            return None, REPHRASE
+        return reply, kind
+
+    def record_rephrase(self, seconds):
+        self.rephrase_seconds.append(seconds)
+
+    def stats(self):
+        skipped = self.model_calls_skipped
+        rephrase = statistics.median(self.rephrase_seconds) if self.rephrase_seconds else None
+        return {
+            **self.rendered,
+            "model_calls_skipped": skipped,
+            "mean_render_ms": mean(self.render_seconds) * 1000,
+            "rephrase_seconds": rephrase,
+            "estimated_seconds_saved": skipped * rephrase if rephrase is not None else None,
+        }
@@ -0,0 +1,84 @@
+import collections
+import concurrent.futures
+import statistics
+import time
+
+from latency_stats import recent_samples
+
+# Seconds each tool may take before the turn goes on without it
+TOOL_TIMEOUTS = {
+    "read_text": 20,
+    "describe_infront_of_me": 20,
+    "recognize_face": 15,
+    "braille_mode_on": 2,
+    "braille_mode_off": 2,
+}
+DEFAULT_TOOL_TIMEOUT = 20
+MAX_TOOL_WORKERS = 4
+
+
+class ToolRunner:
+    """Runs all function calls of a model turn concurrently on a bounded thread pool.
+
+    execute(name, args) -> dict runs one tool (main.run_tool). Every call gets a
+    result dict in the order the calls were made: a tool that raises or outlives
+    its timeout gets an ❌ message instead, so the model still sees a response
+    for each call. A timed-out tool keeps its worker until it returns.
+    """
+
+    def __init__(self, execute, available, max_workers=MAX_TOOL_WORKERS, timeouts=TOOL_TIMEOUTS):
+        self.execute = execute
+        self.available = available
+        self.timeouts = timeouts
+        self.tool_seconds = collections.defaultdict(recent_samples)  # name -> seconds per recent completed call
+        self.timed_out = {}      # name -> count
+        self.batches = 0
+        self.seconds_overlapped = 0.0
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def run_all(self, function_calls):
+        started_at = time.perf_counter()
+        futures = []
+        for call in function_calls:
+            if call.name not in self.available:
+                print(f"Function {call.name} not found!")
+                futures.append((call, None))
+            else:
+                futures.append((call, self._pool.submit(self._timed, call.name, dict(call.args or {}))))
+
+        results = []
+        sequential = 0.0  # what the completed calls would have taken one after another
+        for call, future in futures:
+            if future is None:
+                results.append({"message": f"❌ Function not found: {call.name}"})
+                continue
+            timeout = self.timeouts.get(call.name, DEFAULT_TOOL_TIMEOUT)
+            try:
+                result, seconds = future.result(timeout=max(0.0, started_at + timeout - time.perf_counter()))
+                results.append(result)
+                sequential += seconds
+            except concurrent.futures.TimeoutError:
+                self.timed_out[call.name] = self.timed_out.get(call.name, 0) + 1
+                print(f"⏱️ {call.name} timed out after {timeout}s")
+                results.append({"message": f"❌ Timed out: {call.name} took longer than {timeout} seconds"})
+            except Exception as e:
+                results.append({"message": f"❌ Exception occurred: {e}"})
+
+        self.batches += 1
+        self.seconds_overlapped += max(0.0, sequential - (time.perf_counter() - started_at))
+        return results
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "seconds_overlapped": self.seconds_overlapped,
+            "timed_out": dict(self.timed_out),
+            "median_seconds": {name: statistics.median(s) for name, s in list(self.tool_seconds.items())},
+        }
+
+    def _timed(self, name, args):
+        started_at = time.perf_counter()
+        result = self.execute(name, args)
+        seconds = time.perf_counter() - started_at
+        self.tool_seconds[name].append(seconds)
+        return result, seconds
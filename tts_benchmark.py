@@ -0,0 +1,102 @@
+import contextlib
+import io
+import statistics
+import tempfile
+import time
+
+from tts_cache import SpeechCache
+from vapi_standin import VapiStandIn
+from vapiwebsockettts import VapiWebSocketTTS
+
+SAMPLE_UTTERANCES = [
+    "Braille mode is now ON.",
+    "Detected Sarah with 0.93 confidence.",
+    "There is a table with two chairs in front of you.",
+    "The sign says the store is closed until Monday.",
+    "No matching face found.",
+]
+
+
+def measure_time_to_first_audio(standin, persistent, utterances=SAMPLE_UTTERANCES, rounds=2):
+    """Speak every utterance against the stand-in and return time-to-first-audio samples."""
+    tts = VapiWebSocketTTS("stand-in-key", base_url=standin.url, persistent=persistent)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if persistent:
+            tts.start_session()  # done once at startup in main.py
+        for _ in range(rounds):
+            for text in utterances:
+                tts.speak(text)
+        tts.close()
+    return tts.time_to_first_audio
+
+
+def benchmark_time_to_first_audio(call_setup_delay=0.4, synthesis_delay=0.15):
+    standin = VapiStandIn(call_setup_delay=call_setup_delay, synthesis_delay=synthesis_delay).start()
+    try:
+        print(f"📊 Stand-in: {call_setup_delay * 1000:.0f} ms call setup, {synthesis_delay * 1000:.0f} ms synthesis")
+        for label, persistent in (("call per utterance", False), ("persistent session", True)):
+            calls_before = standin.calls_created
+            samples_ms = [s * 1000 for s in measure_time_to_first_audio(standin, persistent)]
+            print(f"   {label:<19} mean {statistics.mean(samples_ms):6.0f} ms  "
+                  f"p50 {statistics.median(samples_ms):6.0f} ms  max {max(samples_ms):6.0f} ms  "
+                  f"{standin.calls_created - calls_before:3d} calls")
+    finally:
+        standin.stop()
+
+
+def benchmark_reconnect(max_duration_seconds=2, speak_for=6):
+    """Keep speaking past maxDurationSeconds and count how often the session was replaced."""
+    standin = VapiStandIn(call_setup_delay=0.05, synthesis_delay=0.05).start()
+    tts = VapiWebSocketTTS("stand-in-key", base_url=standin.url,
+                           max_duration_seconds=max_duration_seconds)
+    spoken = failed = 0
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tts.start_session()
+            deadline = time.time() + speak_for
+            while time.time() < deadline:
+                if tts.speak("Still here."):
+                    spoken += 1
+                else:
+                    failed += 1
+                time.sleep(0.2)
+            tts.close()
+        print(f"📊 Reconnect: {tts.session_count} sessions over {speak_for} s with "
+              f"maxDurationSeconds={max_duration_seconds}, {spoken} spoken, {failed} failed")
+    finally:
+        standin.stop()
+
+
+def benchmark_cache(rounds=3):
+    """Speak the sample utterances repeatedly with a speech cache, after pre-rendering the first two."""
+    standin = VapiStandIn().start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SpeechCache(directory)
+            tts = VapiWebSocketTTS("stand-in-key", base_url=standin.url, cache=cache)
+            with contextlib.redirect_stdout(io.StringIO()):
+                tts.start_session()
+                tts.prerender(SAMPLE_UTTERANCES[:2])
+                tts.time_to_first_audio.clear()
+                synthesized_before = standin.calls_created
+                for _ in range(rounds):
+                    for text in SAMPLE_UTTERANCES:
+                        tts.speak(text)
+                tts.close()
+            stats = cache.stats()
+            cold = tts.time_to_first_audio[2:len(SAMPLE_UTTERANCES)]
+            warm = tts.time_to_first_audio[len(SAMPLE_UTTERANCES):]
+            print(f"📊 Speech cache: hit rate {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+                  f"{stats['bytes_saved'] / 1024:.0f} KiB not re-synthesized, "
+                  f"{standin.calls_created - synthesized_before} new calls")
+            print(f"   time to first audio: synthesized {statistics.mean(cold) * 1000:6.1f} ms, "
+                  f"cached {statistics.mean(warm) * 1000:6.1f} ms")
+            cache.close()
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    benchmark_time_to_first_audio()
+    benchmark_reconnect()
+    benchmark_cache()
@@ -0,0 +1,138 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+MAX_MEMORY_BYTES = 16 * 1024 * 1024   # mapped audio kept open in the LRU (~8 min of 16 kHz PCM)
+MAX_DISK_BYTES = 256 * 1024 * 1024    # oldest files are deleted past this
+MAX_CACHED_CHARS = 200                # longer texts are one-off answers, not worth keeping
+
+
+class SpeechCache:
+    """PCM audio for previously spoken texts, keyed by (text, voice, sample rate).
+
+    Each entry is a raw .pcm file under directory, opened as a read-only memory
+    map; up to max_memory_bytes of maps stay open in an LRU so repeated phrases
+    are played without touching the network or re-reading the file. hits,
+    misses and bytes_saved (audio served from the cache instead of synthesized)
+    are counted for stats().
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_memory_bytes=MAX_MEMORY_BYTES,
+                 max_disk_bytes=MAX_DISK_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._maps = OrderedDict()  # key -> mmap, most recently used last
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text, voice, sample_rate):
+        normalized = " ".join(text.split())
+        return hashlib.sha1(f"{voice}|{sample_rate}|{normalized}".encode()).hexdigest()
+
+    @staticmethod
+    def cacheable(text):
+        return 0 < len(text.strip()) <= MAX_CACHED_CHARS
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def get(self, text, voice, sample_rate):
+        """Mapped PCM for text, or None on a miss."""
+        key = self.key(text, voice, sample_rate)
+        with self._lock:
+            audio = self._maps.get(key)
+            if audio is not None:
+                self._maps.move_to_end(key)
+            else:
+                audio = self._open(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_saved += len(audio)
+            return audio
+
+    def contains(self, text, voice, sample_rate):
+        key = self.key(text, voice, sample_rate)
+        return key in self._maps or os.path.exists(self.path(key))
+
+    def put(self, text, voice, sample_rate, audio: bytes):
+        """Store synthesized audio for text; ignored for empty audio or uncacheable text."""
+        if not audio or not self.cacheable(text):
+            return
+        key = self.key(text, voice, sample_rate)
+        path = self.path(key)
+        # Write to a temp file first so a crash never leaves a truncated entry behind
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._open(key)
+        self._prune_disk()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "memory_bytes": self._memory_bytes,
+            "entries_in_memory": len(self._maps),
+        }
+
+    def close(self):
+        with self._lock:
+            for audio in self._maps.values():
+                audio.close()
+            self._maps.clear()
+            self._memory_bytes = 0
+
+    def _open(self, key):
+        """Map key's file into the LRU; None if it isn't on disk. Caller holds the lock."""
+        if key in self._maps:
+            return self._maps[key]
+        try:
+            with open(self.path(key), "rb") as f:
+                audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None  # ValueError: empty file, nothing to map
+        self._maps[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and len(self._maps) > 1:
+            _, evicted = self._maps.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            evicted.close()
+        return audio
+
+    def _prune_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pcm"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name[:-len(".pcm")]))
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            with self._lock:
+                audio = self._maps.pop(key, None)
+                if audio is not None:
+                    self._memory_bytes -= len(audio)
+                    audio.close()
+            os.remove(self.path(key))
+            total -= size
@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the parts of the Vapi API that vapiwebsockettts.py uses:
+# POST /call, the vapi.websocket transport and the live call control URL.
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+SAMPLE_RATE = 16000
+CHUNK_MS = 20
+
+
+class StandInCall:
+    def __init__(self, first_message, max_duration):
+        self.id = str(uuid.uuid4())
+        self.first_message = first_message
+        self.max_duration = max_duration
+        self.utterances = queue.Queue()
+        self.ended = threading.Event()
+        if first_message:
+            self.utterances.put(first_message)
+
+
+class VapiStandIn:
+    """Fake Vapi server that "synthesizes" silence with configurable delays.
+
+    call_setup_delay models the POST /call round trip and assistant creation,
+    synthesis_delay the time from a say request (or call start) to the first
+    audio frame. Audio is ms_per_char of 16 kHz PCM per character of text.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, call_setup_delay=0.4, synthesis_delay=0.15,
+                 ms_per_char=60, realtime=False):
+        self.call_setup_delay = call_setup_delay
+        self.synthesis_delay = synthesis_delay
+        self.ms_per_char = ms_per_char
+        self.realtime = realtime
+        self.calls = {}
+        self.calls_created = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for call in self.calls.values():
+            call.ended.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_call(self, payload):
+        time.sleep(self.call_setup_delay)
+        assistant = payload.get("assistant", {})
+        call = StandInCall(assistant.get("firstMessage", ""), assistant.get("maxDurationSeconds", 600))
+        self.calls[call.id] = call
+        self.calls_created += 1
+        host, port = self._server.server_address
+        return {
+            "id": call.id,
+            "transport": {"websocketCallUrl": f"ws://{host}:{port}/call/{call.id}/transport"},
+            "monitor": {"controlUrl": f"http://{host}:{port}/call/{call.id}/control"},
+        }
+
+    def _stream_call(self, call, connection):
+        """Send call.started, then audio for every utterance until the call ends."""
+        send_lock = threading.Lock()
+
+        def send(opcode, payload):
+            header = bytes([0x80 | opcode])
+            if len(payload) < 126:
+                header += bytes([len(payload)])
+            elif len(payload) < 1 << 16:
+                header += bytes([126]) + struct.pack("!H", len(payload))
+            else:
+                header += bytes([127]) + struct.pack("!Q", len(payload))
+            with send_lock:
+                connection.sendall(header + payload)
+
+        def read_frames():
+            # Only close frames matter; everything else from the client is ignored
+            try:
+                while not call.ended.is_set():
+                    head = connection.recv(2)
+                    if len(head) < 2 or head[0] & 0x0F == 0x8:
+                        break
+                    length = head[1] & 0x7F
+                    if length == 126:
+                        length = struct.unpack("!H", connection.recv(2))[0]
+                    elif length == 127:
+                        length = struct.unpack("!Q", connection.recv(8))[0]
+                    connection.recv(4 + length if head[1] & 0x80 else length)
+            except OSError:
+                pass
+            call.ended.set()
+
+        threading.Thread(target=read_frames, daemon=True).start()
+        started_at = time.time()
+        frame = bytes(SAMPLE_RATE * 2 * CHUNK_MS // 1000)
+        try:
+            send(0x1, json.dumps({"type": "call.started"}).encode())
+            while not call.ended.is_set():
+                if time.time() - started_at > call.max_duration:
+                    send(0x1, json.dumps({"type": "call.ended"}).encode())
+                    break
+                try:
+                    text = call.utterances.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                time.sleep(self.synthesis_delay)
+                send(0x1, json.dumps({"type": "speech-update", "status": "started", "role": "assistant"}).encode())
+                for _ in range(max(1, len(text) * self.ms_per_char // CHUNK_MS)):
+                    send(0x2, frame)
+                    if self.realtime:
+                        time.sleep(CHUNK_MS / 1000)
+                send(0x1, json.dumps({"type": "speech-update", "status": "stopped", "role": "assistant"}).encode())
+            send(0x8, struct.pack("!H", 1000))
+        except OSError:
+            pass
+        call.ended.set()
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                message = json.loads(body or b"{}")
+                if self.path == "/call":
+                    self._reply(201, standin._create_call(message))
+                    return
+                call = self._call()
+                if call is None or not self.path.endswith("/control"):
+                    self._reply(404, {"error": "not found"})
+                    return
+                if message.get("type") == "say":
+                    call.utterances.put(message.get("content", ""))
+                elif message.get("type") == "end-call":
+                    call.ended.set()
+                self._reply(200, {"ok": True})
+
+            def do_GET(self):
+                call = self._call()
+                key = self.headers.get("Sec-WebSocket-Key")
+                if call is None or not self.path.endswith("/transport") or not key:
+                    self._reply(404, {"error": "not found"})
+                    return
+                accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                standin._stream_call(call, self.connection)
+                self.close_connection = True
+
+            def _call(self):
+                parts = self.path.strip("/").split("/")
+                return standin.calls.get(parts[1]) if len(parts) == 3 and parts[0] == "call" else None
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
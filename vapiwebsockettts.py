@@ -2,35 +2,66 @@ import requests
 import json
 import websocket
 import threading
-import pyaudio
 import time
 
 from dotenv import load_dotenv
 load_dotenv()
 
+from api_clients import ApiEndpoint
+
+VAPI_BASE_URL = "https://api.vapi.ai"
+SESSION_MAX_DURATION_SECONDS = 600  # Vapi ends the call after this; the session reconnects
+SESSION_RENEW_MARGIN_SECONDS = 30   # Start a fresh call this long before the old one hits its limit
+UTTERANCE_SILENCE_TIMEOUT = 0.8     # No audio for this long after speech started means the utterance is done
+PLAYBACK_DRAIN_TIMEOUT = 30         # Longest wait for buffered audio to finish playing after an utterance
+VOICE = {"provider": "playht", "voiceId": "jennifer"}
+SAMPLE_RATE = 16000
+
 class VapiWebSocketTTS:
-    def __init__(self, api_key):
+    def __init__(self, api_key, audio_sink=None, base_url=VAPI_BASE_URL, persistent=True,
+                 max_duration_seconds=SESSION_MAX_DURATION_SECONDS, cache=None, name="vapi"):
+        """audio_sink is a started audio_output.AudioSink; without one the audio is received but not played.
+        cache is an optional tts_cache.SpeechCache used to replay texts that were spoken before.
+        name labels this instance's endpoint stats, for a second instance such as the prerenderer."""
         self.api_key = api_key
+        self.audio_sink = audio_sink
+        self.cache = cache
+        self.voice_key = f"{VOICE['provider']}:{VOICE['voiceId']}"
+        self.base_url = base_url
+        # POST /call and call control share kept-alive connections; neither is safe to resend
+        # once it reached Vapi, so only connection failures are retried
+        self.api = ApiEndpoint(name, base_url, timeout=(3, 10), retry_on=(requests.exceptions.ConnectionError,))
+        self.persistent = persistent
+        self.max_duration_seconds = max_duration_seconds
         self.ws = None
-        self.audio = None
-        self.stream = None
-        self.is_playing = False
         self.tts_complete = threading.Event()
         self.tts_started = threading.Event()
-        
-    def create_websocket_call(self, text):
-        """Create a WebSocket call for TTS."""
-        url = "https://api.vapi.ai/call"
-        headers = {
-            'authorization': f'Bearer {self.api_key}',
-            'content-type': 'application/json'
-        }
-        
-        # Create assistant for TTS
-        payload = {
+        self.speech_stopped = threading.Event()  # Vapi said the assistant finished speaking, not just a pause
+
+        # Long-lived session state
+        self.control_url = None
+        self.session_started_at = 0.0
+        self.session_count = 0
+        self._session_lock = threading.RLock()
+        self._renew_timer = None
+        self._closing = False
+
+        # Per-utterance timing
+        self.first_audio = threading.Event()
+        self.utterance_started_at = 0.0
+        self.last_audio_at = 0.0
+        self.time_to_first_audio = []  # seconds from speak() to the first audio chunk, per utterance
+        self._recording = None         # bytearray collecting the current utterance's audio for the cache
+        self._muted = False            # synthesize() records without playing
+        self._utterance_active = False # audio outside an utterance is a late tail and is dropped
+
+    def build_call_payload(self, text):
+        """Assistant + transport config for a TTS call; text is spoken as the first message."""
+        return {
             "assistant": {
                 "name": "Vraille Assistant",
                 "firstMessage": text,
+                "firstMessageMode": "assistant-speaks-first" if text else "assistant-waits-for-user",
                 "context": "You are a personal assistant for visually impaired people. You are capable of describing images and things around someone in details, reading texts from the real world image, and recognize faces. You can also switch between braille mode and voice mode to protect users' privacy.",
                 "model": {
                     "provider": "openai",
@@ -42,38 +73,55 @@ class VapiWebSocketTTS:
                         }
                     ]
                 },
-                "voice": {
-                    "provider": "playht",
-                    "voiceId": "jennifer"
-                },
+                "voice": dict(VOICE),
                 "recordingEnabled": False,
                 "interruptionsEnabled": False,
                 "endCallMessage": "",
-                "maxDurationSeconds": 60
+                "maxDurationSeconds": self.max_duration_seconds if self.persistent else 60,
+                "silenceTimeoutSeconds": self.max_duration_seconds if self.persistent else 30
             },
             "transport": {
                 "provider": "vapi.websocket",
                 "audioFormat": {
                     "format": "pcm_s16le",
                     "container": "raw",
-                    "sampleRate": 16000
+                    "sampleRate": SAMPLE_RATE
                 }
             }
         }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
+
+    def create_websocket_call(self, text):
+        """Create a WebSocket call for TTS."""
+        url = f"{self.base_url}/call"
+        headers = {
+            'authorization': f'Bearer {self.api_key}',
+            'content-type': 'application/json'
+        }
+
+        response = self.api.request("POST", url, headers=headers, json=self.build_call_payload(text))
+
         if response.status_code == 201:
             return response.json()
         else:
             print(f"❌ Failed to create WebSocket call: {response.status_code} - {response.text}")
             return None
-    
+
     def on_message(self, ws, message):
         """Handle WebSocket messages."""
+        if ws is not self.ws:
+            return  # Late message from a session that has been replaced
         if isinstance(message, bytes):
             # This is audio data
-            self.play_audio_chunk(message)
+            if not self._utterance_active:
+                return  # Tail of an utterance already given up on; it must not leak into the next one
+            self.last_audio_at = time.time()
+            if not self.first_audio.is_set():
+                self.time_to_first_audio.append(self.last_audio_at - self.utterance_started_at)
+                self.first_audio.set()
+            if self._recording is not None:
+                self._recording += message
+            if not self._muted:
+                self.play_audio_chunk(message)
         else:
             # This is a control message
             try:
@@ -84,82 +132,57 @@ class VapiWebSocketTTS:
                 elif data.get('type') == 'call.ended':
                     print("✅ TTS call ended")
                     self.tts_complete.set()
-                    self.cleanup()
+                    self.end_session(ws)
+                elif data.get('type') == 'speech-update' and data.get('role') == 'assistant' \
+                        and data.get('status') == 'stopped':
+                    self.speech_stopped.set()
+                    self.tts_complete.set()
             except json.JSONDecodeError:
                 pass
-    
+
     def on_error(self, ws, error):
         """Handle WebSocket errors."""
         print(f"❌ WebSocket error: {error}")
-        self.tts_complete.set()  # Signal completion on error
-    
+        if ws is self.ws:
+            self.tts_complete.set()  # Signal completion on error
+
     def on_close(self, ws, close_status_code, close_msg):
         """Handle WebSocket close."""
         print("🔊 WebSocket connection closed")
-        self.tts_complete.set()  # Signal completion when closed
-        self.cleanup()
-    
+        if ws is self.ws:
+            self.tts_complete.set()  # Signal completion when closed
+            self.end_session(ws)
+
     def on_open(self, ws):
         """Handle WebSocket open."""
         print("🔊 WebSocket connection opened")
-        # Initialize audio playback
-        self.setup_audio()
-    
-    def setup_audio(self):
-        """Set up audio playback."""
-        try:
-            self.audio = pyaudio.PyAudio()
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=16000,
-                output=True,
-                frames_per_buffer=1024,
-                # output_device_index=5  # 5 is Input device (default speaker)
-                output_device_index=7  # 5 is Input device (default speaker)
-            )
-            self.is_playing = True
-        except Exception as e:
-            print(f"❌ Error setting up audio: {e}")
-    
+
     def play_audio_chunk(self, audio_data):
-        """Play audio chunk."""
-        if self.stream and self.is_playing:
-            try:
-                self.stream.write(audio_data)
-            except Exception as e:
-                print(f"❌ Error playing audio: {e}")
-    
-    def cleanup(self):
-        """Clean up audio resources."""
-        self.is_playing = False
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        if self.audio:
-            self.audio.terminate()
-    
-    def speak(self, text):
-        """Convert text to speech using Vapi WebSocket."""
-        print("🔊 Starting Vapi WebSocket TTS...")
-        
-        # Reset events for new TTS session
-        self.tts_complete.clear()
+        """Hand an audio chunk to the sink; never blocks the WebSocket thread."""
+        if self.audio_sink:
+            self.audio_sink.write(audio_data)
+
+    def finish_playback(self):
+        """Let the sink play out the utterance's tail and wait until it has."""
+        if self.audio_sink:
+            self.audio_sink.mark_end()
+            self.audio_sink.drain(timeout=PLAYBACK_DRAIN_TIMEOUT)
+
+    def connect(self, text=""):
+        """Create a call and open its WebSocket; returns the call data or None."""
         self.tts_started.clear()
-        
-        # Create WebSocket call
         call_data = self.create_websocket_call(text)
         if not call_data:
-            return False
-        
+            return None
+
         # Get WebSocket URL
         ws_url = call_data.get('transport', {}).get('websocketCallUrl')
         if not ws_url:
             print("❌ No WebSocket URL in response")
-            return False
-        
+            return None
+
         print(f"📞 Connecting to WebSocket: {ws_url}")
-        
+
         # Create WebSocket connection
         websocket.enableTrace(False)  # Set to True for debugging
         self.ws = websocket.WebSocketApp(
@@ -169,24 +192,224 @@ class VapiWebSocketTTS:
             on_close=self.on_close,
             on_open=self.on_open
         )
-        
+
         # Run WebSocket in a separate thread
-        def run_websocket():
-            self.ws.run_forever()
-        
-        ws_thread = threading.Thread(target=run_websocket)
+        ws_thread = threading.Thread(target=self.ws.run_forever)
         ws_thread.daemon = True
         ws_thread.start()
-        
-        # Wait for TTS to start (with timeout)
-        if self.tts_started.wait(timeout=10):
-            # Wait for TTS to complete (with timeout)
-            if self.tts_complete.wait(timeout=60):
-                print("🎵 TTS playback completed")
+        return call_data
+
+    def start_session(self):
+        """Open the long-lived TTS call used by every utterance; True once it is ready."""
+        with self._session_lock:
+            if self.session_alive():
                 return True
-            else:
+            self._closing = False
+
+            print("🔊 Starting Vapi TTS session...")
+            call_data = self.connect()
+            if not call_data:
+                return False
+            self.control_url = call_data.get('monitor', {}).get('controlUrl')
+            if not self.control_url:
+                print("❌ No control URL in response")
+                self.close_websocket()
+                return False
+
+            if not self.tts_started.wait(timeout=10):
+                print("⏰ TTS session failed to start - timeout")
+                self.close_websocket()
+                return False
+
+            self.session_started_at = time.time()
+            self.session_count += 1
+
+            # Replace the call shortly before Vapi ends it at maxDurationSeconds
+            renew_in = max(self.max_duration_seconds - SESSION_RENEW_MARGIN_SECONDS, 1)
+            self._renew_timer = threading.Timer(renew_in, self.renew_session)
+            self._renew_timer.daemon = True
+            self._renew_timer.start()
+            return True
+
+    def session_alive(self):
+        return self.ws is not None and self.control_url is not None and self.tts_started.is_set()
+
+    def end_session(self, ws):
+        """Forget a session that Vapi ended or dropped, reconnecting in the background."""
+        with self._session_lock:
+            if ws is not self.ws:
+                return
+            self.ws = None
+            self.control_url = None
+            self.tts_started.clear()
+            if self._renew_timer:
+                self._renew_timer.cancel()
+            if self.persistent and not self._closing:
+                print("🔄 TTS session ended, reconnecting...")
+                threading.Thread(target=self.start_session, daemon=True).start()
+
+    def renew_session(self):
+        """Swap the current call for a fresh one before it reaches its duration limit."""
+        with self._session_lock:
+            if self._closing:
+                return
+            print("🔄 Renewing TTS session before it expires...")
+            self.close_websocket()
+            self.start_session()
+
+    def close_websocket(self):
+        ws = self.ws
+        self.ws = None
+        self.control_url = None
+        self.tts_started.clear()
+        if self._renew_timer:
+            self._renew_timer.cancel()
+        if ws:
+            ws.close()
+
+    def close(self):
+        """End the session for good (no reconnect)."""
+        with self._session_lock:
+            self._closing = True
+            self.close_websocket()
+
+    def send_control(self, message):
+        """Send a live call control message such as {"type": "say", ...}."""
+        response = self.api.request("POST", self.control_url, json=message)
+        if response.status_code >= 300:
+            print(f"❌ Control message failed: {response.status_code} - {response.text}")
+            return False
+        return True
+
+    def wait_for_utterance(self):
+        """Block until the current utterance has been played; False on timeout."""
+        if not self.first_audio.wait(timeout=10):
+            print("⏰ TTS failed to start - timeout")
+            return False
+        deadline = time.time() + 60
+        while not self.tts_complete.wait(timeout=0.05):
+            if time.time() - self.last_audio_at > UTTERANCE_SILENCE_TIMEOUT:
+                break  # No end-of-speech event, but the audio has stopped
+            if time.time() > deadline:
                 print("⏰ TTS timeout - continuing anyway")
+                if not self._muted:
+                    self.finish_playback()
                 return False
-        else:
+        if not self._muted:
+            self.finish_playback()
+        print("🎵 TTS playback completed")
+        return True
+
+    def speak(self, text):
+        """Convert text to speech using Vapi WebSocket."""
+        if self.play_cached(text):
+            return True
+        recording = self.cache is not None and self.cache.cacheable(text)
+        # The lock keeps a synthesize() on this session from sharing this utterance's recording
+        with self._session_lock:
+            self._recording = bytearray() if recording else None
+            try:
+                if not self.persistent:
+                    completed = self.speak_with_new_call(text)
+                else:
+                    completed = self.speak_on_session(text)
+                if completed and recording:
+                    self.cache_recording(text)
+                return completed
+            finally:
+                self._utterance_active = False
+                self._recording = None
+
+    def cache_recording(self, text):
+        """Store the utterance just recorded, if Vapi confirmed it was spoken to the end; True if stored.
+
+        An utterance that only went quiet (a stall, or the socket closing) may be cut
+        short, and a truncated recording would be replayed for good.
+        """
+        if not self.speech_stopped.is_set():
+            print("⚠️ Utterance ended without Vapi's end of speech, not caching it")
+            return False
+        self.cache.put(text, self.voice_key, SAMPLE_RATE, bytes(self._recording))
+        return True
+
+    def begin_utterance(self):
+        """Reset the per-utterance events and start accepting its audio."""
+        self.tts_complete.clear()
+        self.speech_stopped.clear()
+        self.first_audio.clear()
+        self.utterance_started_at = time.time()
+        self.last_audio_at = self.utterance_started_at
+        if self._recording is not None:
+            self._recording.clear()
+        self._utterance_active = True
+
+    def play_cached(self, text):
+        """Play text's audio from the cache; False if it has never been synthesized."""
+        if self.cache is None:
+            return False
+        started_at = time.time()
+        audio = self.cache.get(text, self.voice_key, SAMPLE_RATE)
+        if audio is None:
+            return False
+        print("💾 Speaking from TTS cache...")
+        self.time_to_first_audio.append(time.time() - started_at)
+        self.play_audio_chunk(audio)
+        self.finish_playback()
+        return True
+
+    def synthesize(self, text):
+        """Synthesize text into the cache without playing it, e.g. to pre-render hot phrases."""
+        if self.cache is None or self.cache.contains(text, self.voice_key, SAMPLE_RATE):
+            return True
+        with self._session_lock:
+            self._muted = True
+            self._recording = bytearray()
+            try:
+                completed = self.speak_on_session(text) if self.persistent else self.speak_with_new_call(text)
+                if completed:
+                    completed = self.cache_recording(text)
+                return completed
+            finally:
+                self._utterance_active = False
+                self._recording = None
+                self._muted = False
+
+    def prerender(self, phrases):
+        """Make sure every phrase is in the cache; returns how many had to be synthesized."""
+        missing = [p for p in phrases if self.cache and not self.cache.contains(p, self.voice_key, SAMPLE_RATE)]
+        for phrase in missing:
+            self.synthesize(phrase)
+        return len(missing)
+
+    def speak_on_session(self, text):
+        """Speak text on the long-lived session, starting it if needed."""
+        with self._session_lock:
+            if not self.session_alive() and not self.start_session():
+                return False
+
+            print("🔊 Speaking on Vapi TTS session...")
+            self.begin_utterance()
+            if not self.send_control({"type": "say", "content": text, "endCallAfterSpoken": False}):
+                return False
+            return self.wait_for_utterance()
+
+    def speak_with_new_call(self, text):
+        """Speak text on a call of its own (one call per utterance)."""
+        print("🔊 Starting Vapi WebSocket TTS...")
+
+        # Reset events for new TTS session
+        self.begin_utterance()
+
+        # Create WebSocket call
+        call_data = self.connect(text)
+        if not call_data:
+            return False
+
+        # Wait for TTS to start (with timeout)
+        if not self.tts_started.wait(timeout=10):
             print("⏰ TTS failed to start - timeout")
             return False
+
+        completed = self.wait_for_utterance()
+        self.close_websocket()
+        return completed